@@ -0,0 +1,189 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import subprocess
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+
+import httpx
+
+from benchmarks.fake_api import FakeApiConfig
+from benchmarks.fake_api import FakeApiServer
+from framework.dirs import DIR_REPO
+from framework.supported_api.blog.validate_api import test_post_global
+from framework.utils.config import reload_settings
+from framework.utils.http import close_pool
+
+DIR_RESULTS = (DIR_REPO / ".benchmarks").resolve()
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def get_peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux and in bytes on Mac OS X
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    divider = 1024 * 1024 if platform.system() == "Darwin" else 1024
+    return round(peak / divider, 2)
+
+
+def get_commit() -> Optional[str]:
+    try:
+        run = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=DIR_REPO,
+            check=True,
+            capture_output=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return run.stdout.decode().strip()
+
+
+async def measure(
+    func: Callable[[], Awaitable[None]],
+    requests: int,
+    concurrency: int,
+) -> Dict:
+    latencies = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_one():
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await func()
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(run_one() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 4),
+        "throughput_rps": round(requests / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "peak_rss_mb": get_peak_rss_mb(),
+    }
+
+
+async def bench_scenario(url: str, requests: int, concurrency: int) -> Dict:
+    result = await measure(lambda: test_post_global(url), requests, concurrency)
+    await close_pool()
+    return result
+
+
+async def bench_endpoint(url: str, requests: int, concurrency: int) -> Dict:
+    from main.main import app
+
+    # measure the pipeline, not the result cache
+    os.environ["RESULT_CACHE_TTL"] = "0"
+    reload_settings()
+
+    async def post_test():
+        resp = await client.post("/", json={"data": {"url": url, "fresh": True}})
+        resp.raise_for_status()
+        assert resp.json()["data"]["ok"], resp.json()["data"]["description"]
+
+    async with httpx.AsyncClient(app=app, base_url="http://bench") as client:
+        result = await measure(post_test, requests, concurrency)
+
+    await close_pool()
+    return result
+
+
+def compare(current: Dict, baseline: Dict) -> None:
+    for bench_name, metrics in current["results"].items():
+        base_metrics = baseline["results"].get(bench_name, {})
+        print(f"{bench_name}:")
+        for metric, value in metrics.items():
+            base_value = base_metrics.get(metric)
+            if not base_value:
+                print(f"  {metric:<16} {value}")
+                continue
+            change = (value - base_value) / base_value * 100
+            print(f"  {metric:<16} {value} (was {base_value}, {change:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="benchmark the validation pipeline against a local fake blog API"
+    )
+    parser.add_argument("--latency", type=float, default=0.01, help="seconds")
+    parser.add_argument("--posts", type=int, default=1000, help="initial list size")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--output", type=Path, help="where to save JSON results")
+    parser.add_argument("--baseline", type=Path, help="JSON results to compare with")
+    args = parser.parse_args()
+
+    config = FakeApiConfig(
+        latency=args.latency,
+        posts=args.posts,
+        error_rate=args.error_rate,
+    )
+
+    with FakeApiServer(config) as server:
+        results = {
+            "test_post_global": asyncio.run(
+                bench_scenario(server.url, args.requests, args.concurrency)
+            ),
+            "post_endpoint": asyncio.run(
+                bench_endpoint(server.url, args.requests, args.concurrency)
+            ),
+        }
+
+    report = {
+        "commit": get_commit(),
+        "python": platform.python_version(),
+        "timestamp": datetime.utcnow().isoformat(),
+        "params": {
+            "latency": args.latency,
+            "posts": args.posts,
+            "error_rate": args.error_rate,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+        },
+        "results": results,
+    }
+
+    output = args.output
+    if output is None:
+        stamp = datetime.utcnow().strftime("%Y-%m-%d-%H-%M-%S")
+        output = DIR_RESULTS / f"pipeline-{stamp}-{report['commit']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, sort_keys=True))
+
+    if args.baseline:
+        compare(report, json.loads(args.baseline.read_text()))
+    else:
+        print(json.dumps(results, indent=2))
+
+    print(f"\nresults saved to {output.as_posix()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import argparse
+import timeit
+from typing import Dict
+
+from framework.supported_api.blog.schemas.posts import PostListApi
+from framework.utils.fastschema import CompiledModel
+
+
+def build_payload(size: int) -> Dict:
+    posts = [
+        {"id": _i, "author_id": _i % 7 + 1, "content": f"post #{_i}"}
+        for _i in range(size)
+    ]
+    return {"data": posts, "errors": None}
+
+
+def bench(size: int, repeat: int) -> Dict[str, float]:
+    payload = build_payload(size)
+    compiled = CompiledModel(PostListApi)
+
+    cases = {
+        "parse_obj": lambda: PostListApi.parse_obj(payload),
+        "compiled.parse": lambda: compiled.parse(payload),
+        "compiled.check": lambda: compiled.check(payload),
+    }
+
+    results = {}
+    for name, func in cases.items():
+        timings = timeit.repeat(func, number=1, repeat=repeat)
+        results[name] = min(timings)
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="compiled schemas vs parse_obj")
+    parser.add_argument("--size", type=int, default=10_000, help="posts in a list")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    results = bench(args.size, args.repeat)
+    baseline = results["parse_obj"]
+
+    print(f"PostListApi with {args.size} posts, best of {args.repeat}:")
+    for name, elapsed in results.items():
+        print(f"  {name:<16} {elapsed * 1000:9.2f} ms  x{baseline / elapsed:.1f}")
+
+
+if __name__ == "__main__":
+    main()
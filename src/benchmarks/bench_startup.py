@@ -0,0 +1,134 @@
+import argparse
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Dict
+from typing import List
+
+from benchmarks.bench_pipeline import compare
+from benchmarks.bench_pipeline import DIR_RESULTS
+from benchmarks.bench_pipeline import get_commit
+from framework.dirs import DIR_SRC
+
+# measures the work a fresh gunicorn worker does without preload_app;
+# main.main builds its app when imported, so the module is run without
+# its `app = create_app()` line to time importing and building apart
+BOOT_CODE = """
+import ast
+import importlib.util
+import sys
+import time
+
+spec = importlib.util.find_spec("main.main")
+tree = ast.parse(spec.loader.get_source(spec.name))
+tree.body = [
+    _node
+    for _node in tree.body
+    if not (
+        isinstance(_node, ast.Assign)
+        and [getattr(_t, "id", None) for _t in _node.targets] == ["app"]
+    )
+]
+code = compile(tree, spec.origin, "exec")
+module = importlib.util.module_from_spec(spec)
+sys.modules[spec.name] = module
+
+started = time.perf_counter()
+exec(code, module.__dict__)
+imported = time.perf_counter()
+module.create_app()
+built = time.perf_counter()
+print(imported - started, built - imported)
+"""
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def run_python(*args: str) -> subprocess.CompletedProcess:
+    env = {**os.environ, "PYTHONPATH": DIR_SRC.as_posix(), "MODE_DEBUG": "0"}
+    return subprocess.run(
+        [sys.executable, *args],
+        check=True,
+        capture_output=True,
+        env=env,
+    )
+
+
+def measure_boot(repeat: int) -> Dict:
+    imports, builds = [], []
+    for _ in range(repeat):
+        output = run_python("-c", BOOT_CODE).stdout.decode().split()
+        imports.append(float(output[0]))
+        builds.append(float(output[1]))
+
+    return {
+        "import_ms": round(statistics.median(imports) * 1000, 2),
+        "create_app_ms": round(statistics.median(builds) * 1000, 2),
+    }
+
+
+def top_imports(limit: int) -> List[Dict]:
+    # the imports of a boot, including those create_app() does lazily
+    stderr = run_python("-X", "importtime", "-c", BOOT_CODE).stderr.decode()
+
+    modules = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, _indent, module = match.groups()
+            modules.append(
+                {
+                    "module": module,
+                    "self_ms": int(self_us) / 1000,
+                    "cumulative_ms": int(cumulative_us) / 1000,
+                }
+            )
+
+    modules.sort(key=lambda _m: _m["self_ms"], reverse=True)
+    return modules[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="benchmark worker boot time")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="slowest imports to list")
+    parser.add_argument("--output", type=Path, help="where to save JSON results")
+    parser.add_argument("--baseline", type=Path, help="JSON results to compare with")
+    args = parser.parse_args()
+
+    report = {
+        "commit": get_commit(),
+        "python": platform.python_version(),
+        "timestamp": datetime.utcnow().isoformat(),
+        "params": {"repeat": args.repeat},
+        "results": {"boot": measure_boot(args.repeat)},
+        "top_imports": top_imports(args.top),
+    }
+
+    output = args.output
+    if output is None:
+        stamp = datetime.utcnow().strftime("%Y-%m-%d-%H-%M-%S")
+        output = DIR_RESULTS / f"startup-{stamp}-{report['commit']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, sort_keys=True))
+
+    if args.baseline:
+        compare(report, json.loads(args.baseline.read_text()))
+    else:
+        print(json.dumps(report["results"], indent=2))
+
+    print("\nslowest imports (self time):")
+    for module in report["top_imports"]:
+        print(f"  {module['self_ms']:9.2f} ms  {module['module']}")
+
+    print(f"\nresults saved to {output.as_posix()}")
+
+
+if __name__ == "__main__":
+    main()
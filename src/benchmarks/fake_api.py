@@ -0,0 +1,142 @@
+import asyncio
+import random
+import socket
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict
+from typing import List
+from urllib.parse import urlencode
+
+import uvicorn
+from fastapi import FastAPI
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from fastapi.responses import Response
+
+
+@dataclass
+class FakeApiConfig:
+    latency: float = 0.0
+    posts: int = 100
+    users: int = 10
+    error_rate: float = 0.0
+    seed: int = 0
+    page_size: int = 0
+
+
+def create_fake_api(config: FakeApiConfig) -> FastAPI:
+    """
+    Builds a stand-in for a student's blog API:
+    /api/v1/user/, /api/v1/blog/post/ and /api/v1/blog/post/{id}.
+
+    Every response is delayed by `latency` seconds,
+    and fails with 500 with the `error_rate` probability.
+
+    The post list is split into pages of `page_size` posts (or `page[size]`)
+    linked with `links.next`, if either is set; `sort=-id` lists newest first.
+    """
+
+    app = FastAPI()
+    rnd = random.Random(config.seed)
+
+    users: List[Dict] = [{"id": _i} for _i in range(1, config.users + 1)]
+    posts: Dict[int, Dict] = {
+        _i: {"id": _i, "author_id": _i % config.users + 1, "content": f"post #{_i}"}
+        for _i in range(1, config.posts + 1)
+    }
+    last_id = config.posts
+
+    @app.middleware("http")
+    async def simulate_network(request: Request, call_next):
+        if config.latency:
+            await asyncio.sleep(config.latency)
+        if rnd.random() < config.error_rate:
+            return JSONResponse({"errors": ["fake failure"]}, status_code=500)
+        return await call_next(request)
+
+    @app.get("/api/v1/user/")
+    async def view_users():
+        return {"data": users}
+
+    @app.get("/api/v1/blog/post/")
+    async def view_posts(request: Request):
+        query = dict(request.query_params)
+        items = list(posts.values())
+        if query.get("sort") == "-id":
+            items.reverse()
+
+        size = int(query.get("page[size]") or config.page_size)
+        if not size:
+            return {"data": items}
+
+        number = int(query.get("page[number]") or 1)
+        page = {"data": items[(number - 1) * size : number * size]}
+        if number * size < len(items):
+            query["page[number]"] = number + 1
+            page["links"] = {"next": f"{request.url.path}?{urlencode(query)}"}
+        return page
+
+    @app.post("/api/v1/blog/post/", status_code=201)
+    async def view_create_post(request: Request):
+        nonlocal last_id
+        payload = await request.json()
+        last_id += 1
+        post = posts[last_id] = {**payload["data"], "id": last_id}
+        return {"data": post}
+
+    @app.get("/api/v1/blog/post/{post_id}")
+    async def view_post(post_id: int):
+        if post_id not in posts:
+            return JSONResponse({"errors": ["not found"]}, status_code=404)
+        return {"data": posts[post_id]}
+
+    @app.delete("/api/v1/blog/post/{post_id}", status_code=204)
+    async def view_delete_post(post_id: int):
+        if posts.pop(post_id, None) is None:
+            return JSONResponse({"errors": ["not found"]}, status_code=404)
+        return Response(status_code=204)
+
+    return app
+
+
+class FakeApiServer:
+    """
+    Runs the fake API with uvicorn in a background thread of this process.
+
+        with FakeApiServer(FakeApiConfig(latency=0.05)) as server:
+            await test_post_global(server.url)
+    """
+
+    def __init__(self, config: FakeApiConfig, host: str = "127.0.0.1"):
+        self.host = host
+        self.port = _get_free_port(host)
+        self.url = f"http://{host}:{self.port}"
+        uvicorn_config = uvicorn.Config(
+            create_fake_api(config),
+            host=host,
+            port=self.port,
+            log_level="warning",
+            loop="asyncio",
+            access_log=False,
+        )
+        self.server = uvicorn.Server(uvicorn_config)
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    def __enter__(self) -> "FakeApiServer":
+        self.thread.start()
+        while not self.server.started:
+            if not self.thread.is_alive():
+                raise RuntimeError(f"fake API has not started on {self.url}")
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *_exc_info) -> None:
+        self.server.should_exit = True
+        self.thread.join()
+
+
+def _get_free_port(host: str) -> int:
+    with socket.socket() as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
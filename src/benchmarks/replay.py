@@ -0,0 +1,103 @@
+import argparse
+import asyncio
+import cProfile
+import json
+import pstats
+import time
+from collections import Counter
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict
+
+from benchmarks.bench_pipeline import percentile
+from framework.supported_api.blog.timings import collect_timings
+from framework.supported_api.blog.validate_api import test_post_global
+from framework.utils.cassette import Cassette
+from framework.utils.cassette import CassettePlayer
+from framework.utils.http import ClientPool
+from framework.utils.http import close_pool
+from framework.utils.http import use_pool
+
+
+async def replay(cassette: Cassette, speed: float, repeat: int) -> Dict:
+    """
+    Runs the validation scenario against the cassette `repeat` times
+    and reports its latency and time spent per step.
+    """
+
+    durations = []
+    failures: Counter = Counter()
+    steps: Dict[str, Dict[str, float]] = defaultdict(Counter)
+
+    for _ in range(repeat):
+        player = CassettePlayer(cassette, speed=speed)
+        await use_pool(ClientPool(transport=player, record=False))
+
+        started = time.perf_counter()
+        with collect_timings() as timings:
+            try:
+                await test_post_global(cassette.target)
+            except Exception as err:
+                failures[f"{type(err).__name__}: {err}"] += 1
+        durations.append(time.perf_counter() - started)
+
+        for timing in timings:
+            step = steps[timing.step]
+            step["calls"] += 1
+            step["bytes"] += timing.size
+            step["decode_ms"] += timing.decode * 1000
+            step["validation_ms"] += timing.validation * 1000
+
+    await close_pool()
+
+    durations.sort()
+    return {
+        "target": cassette.target,
+        "exchanges": len(cassette.exchanges),
+        "runs": repeat,
+        "failures": dict(failures),
+        "p50_ms": round(percentile(durations, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(durations, 0.95) * 1000, 2),
+        "steps": {
+            _name: {_k: round(_v / repeat, 3) for _k, _v in _step.items()}
+            for _name, _step in steps.items()
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="replay validations recorded with CASSETTE_RECORD_DIR offline"
+    )
+    parser.add_argument("cassettes", type=Path, nargs="+")
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=0.0,
+        help="1 keeps the recorded timing, 0 replays as fast as possible",
+    )
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--profile", type=Path, help="where to save cProfile stats")
+    args = parser.parse_args()
+
+    profiler = cProfile.Profile() if args.profile else None
+    results = {}
+
+    for path in args.cassettes:
+        cassette = Cassette.load(path)
+        if profiler is not None:
+            profiler.enable()
+        results[path.name] = asyncio.run(replay(cassette, args.speed, args.repeat))
+        if profiler is not None:
+            profiler.disable()
+
+    print(json.dumps(results, indent=2))
+
+    if profiler is not None:
+        profiler.dump_stats(args.profile)
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(20)
+        print(f"\nprofile saved to {args.profile.as_posix()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import json
+import traceback
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+
+import httpx
+from pydantic import ValidationError
+
+from framework.utils.breaker import CircuitOpenError
+
+# errors which mean the target API is broken or down, not this service
+TARGET_ERRORS = (
+    AssertionError,
+    ValidationError,
+    json.JSONDecodeError,
+    httpx.TimeoutException,
+    httpx.NetworkError,
+    CircuitOpenError,
+)
+
+
+class CheckFailed(AssertionError):
+    """
+    A failed check of the target API: what was expected and what was found.
+    """
+
+    def __init__(
+        self,
+        message: str,
+        kind: str,
+        expected: Any = None,
+        actual: Any = None,
+        status: Optional[int] = None,
+    ):
+        super().__init__(message)
+        self.kind = kind
+        self.expected = expected
+        self.actual = actual
+        self.status = status
+
+
+@dataclass
+class Failure:
+    """
+    A structured report of a failed validation, built without formatting the stack.
+
+    The error is kept with its frames cleared, and the traceback is formatted
+    only if it is asked for, once.
+    """
+
+    description: str
+    kind: str
+    step: Optional[str] = None
+    expected: Any = None
+    actual: Any = None
+    status: Optional[int] = None
+    error: Optional[BaseException] = field(default=None, repr=False, compare=False)
+    _tb: Optional[List[str]] = field(default=None, repr=False, compare=False)
+
+    @classmethod
+    def from_error(cls, err: BaseException) -> "Failure":
+        if err.__traceback__ is not None:
+            # drop local variables of finished frames, keep file and line numbers
+            traceback.clear_frames(err.__traceback__)
+
+        failure = cls(
+            description=str(err),
+            kind=get_kind(err),
+            step=getattr(err, "step", None),
+            error=err,
+        )
+
+        if isinstance(err, CheckFailed):
+            failure.expected = err.expected
+            failure.actual = err.actual
+            failure.status = err.status
+        elif isinstance(err, ValidationError):
+            failure.actual = [
+                {"loc": list(_e["loc"]), "msg": _e["msg"]} for _e in err.errors()
+            ]
+        elif failure.kind in ("timeout", "down", "circuit_open"):
+            failure.description = "your api is down"
+
+        return failure
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "step": self.step,
+            "kind": self.kind,
+            "expected": self.expected,
+            "actual": self.actual,
+            "status": self.status,
+        }
+
+    def format_traceback(self) -> Optional[List[str]]:
+        if self._tb is None and self.error is not None:
+            err = self.error
+            lines = traceback.format_exception(type(err), err, err.__traceback__)
+            self._tb = "".join(lines).split("\n")
+        return self._tb
+
+
+def get_kind(err: BaseException) -> str:
+    if isinstance(err, CheckFailed):
+        return err.kind
+    if isinstance(err, AssertionError):
+        return "assertion"
+    if isinstance(err, ValidationError):
+        return "schema"
+    if isinstance(err, json.JSONDecodeError):
+        return "json"
+    if isinstance(err, httpx.TimeoutException):
+        return "timeout"
+    if isinstance(err, CircuitOpenError):
+        return "circuit_open"
+    return "down"
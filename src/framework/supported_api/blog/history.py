@@ -0,0 +1,378 @@
+import asyncio
+import bisect
+import json
+import logging
+import tempfile
+import time
+from collections import defaultdict
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+from typing import Deque
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Sequence
+
+from framework.supported_api.blog.schemas.base import JsonApiObject
+from framework.utils.config import get_settings
+from framework.utils.db import get_db_pool
+from framework.utils.dbpool import ConnectionPool
+from framework.utils.dbpool import create_sqlite_pool
+from framework.utils.metrics import REGISTRY
+
+LOGGER = logging.getLogger(__name__)
+
+# upper bounds of latency buckets of hourly rollups;
+# slower validations are counted in the last bucket
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+HOUR = 3600
+
+HISTORY_RECORDS = REGISTRY.counter(
+    "validation_history_records",
+    "Validation results sent to the history store, by outcome.",
+    labels=("outcome",),
+)
+
+DDL = (
+    """
+    CREATE TABLE IF NOT EXISTS validation_results (
+        target TEXT NOT NULL,
+        ok BOOLEAN NOT NULL,
+        description TEXT,
+        total_ms DOUBLE PRECISION NOT NULL,
+        steps TEXT,
+        created_at DOUBLE PRECISION NOT NULL
+    )
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS validation_results_target_idx
+    ON validation_results (target, created_at)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS validation_results_created_idx
+    ON validation_results (created_at)
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS validation_rollups (
+        target TEXT NOT NULL,
+        hour BIGINT NOT NULL,
+        runs INTEGER NOT NULL,
+        passed INTEGER NOT NULL,
+        total_ms DOUBLE PRECISION NOT NULL,
+        PRIMARY KEY (target, hour)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS validation_rollup_latency (
+        target TEXT NOT NULL,
+        hour BIGINT NOT NULL,
+        le DOUBLE PRECISION NOT NULL,
+        runs INTEGER NOT NULL,
+        PRIMARY KEY (target, hour, le)
+    )
+    """,
+)
+
+
+@dataclass
+class HistoryRecord:
+    target: str
+    ok: bool
+    description: str
+    total_ms: float
+    steps: List[Dict[str, Any]]
+    created_at: float
+
+    @classmethod
+    def from_result(
+        cls, target: str, resp: JsonApiObject, total_ms: float
+    ) -> "HistoryRecord":
+        if resp.data is None:
+            ok, description, steps = False, (resp.errors or [""])[0], []
+        else:
+            ok = bool(resp.data.get("ok"))
+            description = resp.data.get("description") or ""
+            steps = (resp.data.get("timings") or {}).get("steps") or []
+
+        return cls(
+            target=target,
+            ok=ok,
+            description=description,
+            total_ms=total_ms,
+            steps=steps,
+            created_at=time.time(),
+        )
+
+
+def get_latency_bucket(total_ms: float) -> float:
+    index = bisect.bisect_left(LATENCY_BUCKETS_MS, total_ms)
+    return LATENCY_BUCKETS_MS[min(index, len(LATENCY_BUCKETS_MS) - 1)]
+
+
+def get_percentile(buckets: Sequence, runs: int, q: float) -> Optional[float]:
+    """
+    Returns the upper bound of the bucket holding the q-th quantile.
+    Buckets are (le, runs) pairs sorted by le.
+    """
+
+    cumulative = 0
+    for le, count in buckets:
+        cumulative += count
+        if cumulative >= q * runs:
+            return le
+    return None
+
+
+class HistoryStore:
+    """
+    Keeps every validation result in `validation_results`,
+    and per-target hourly rollups of them:
+
+    - `validation_rollups`: number of runs, passed runs, total latency;
+    - `validation_rollup_latency`: number of runs per latency bucket.
+
+    Rollups are updated in the same transaction as raw rows are inserted,
+    so dashboards can read them without scanning raw rows.
+    Raw rows older than `retention` seconds are deleted on each write
+    (0 keeps them forever); rollups are kept.
+    """
+
+    def __init__(
+        self, pool: ConnectionPool, placeholder: str = "%s", retention: float = 0
+    ):
+        self.pool = pool
+        self.placeholder = placeholder
+        self.retention = retention
+
+    def _sql(self, query: str) -> str:
+        return query.format(p=self.placeholder)
+
+    @contextmanager
+    def _cursor(self) -> Iterator[Any]:
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            try:
+                yield cursor
+            finally:
+                cursor.close()
+
+    def setup(self) -> None:
+        with self._cursor() as cursor:
+            for statement in DDL:
+                cursor.execute(statement)
+
+    def write(self, records: Sequence[HistoryRecord]) -> None:
+        rollups: Dict = defaultdict(lambda: [0, 0, 0.0])
+        latency: Dict = defaultdict(int)
+        for record in records:
+            hour = int(record.created_at // HOUR * HOUR)
+            rollup = rollups[(record.target, hour)]
+            rollup[0] += 1
+            rollup[1] += record.ok
+            rollup[2] += record.total_ms
+            latency[(record.target, hour, get_latency_bucket(record.total_ms))] += 1
+
+        with self._cursor() as cursor:
+            cursor.executemany(
+                self._sql(
+                    "INSERT INTO validation_results"
+                    " (target, ok, description, total_ms, steps, created_at)"
+                    " VALUES ({p}, {p}, {p}, {p}, {p}, {p})"
+                ),
+                [
+                    (
+                        _r.target,
+                        _r.ok,
+                        _r.description,
+                        _r.total_ms,
+                        json.dumps(_r.steps),
+                        _r.created_at,
+                    )
+                    for _r in records
+                ],
+            )
+            cursor.executemany(
+                self._sql(
+                    "INSERT INTO validation_rollups"
+                    " (target, hour, runs, passed, total_ms)"
+                    " VALUES ({p}, {p}, {p}, {p}, {p})"
+                    " ON CONFLICT (target, hour) DO UPDATE SET"
+                    " runs = validation_rollups.runs + excluded.runs,"
+                    " passed = validation_rollups.passed + excluded.passed,"
+                    " total_ms = validation_rollups.total_ms + excluded.total_ms"
+                ),
+                [_key + tuple(_value) for _key, _value in rollups.items()],
+            )
+            cursor.executemany(
+                self._sql(
+                    "INSERT INTO validation_rollup_latency (target, hour, le, runs)"
+                    " VALUES ({p}, {p}, {p}, {p})"
+                    " ON CONFLICT (target, hour, le) DO UPDATE SET"
+                    " runs = validation_rollup_latency.runs + excluded.runs"
+                ),
+                [_key + (_value,) for _key, _value in latency.items()],
+            )
+            if self.retention > 0:
+                cursor.execute(
+                    self._sql("DELETE FROM validation_results WHERE created_at < {p}"),
+                    (time.time() - self.retention,),
+                )
+
+    def rollups(self, target: str, since: float = 0) -> List[Dict[str, Any]]:
+        """
+        Returns hourly pass rates and latency percentiles of a target.
+        """
+
+        since_hour = int(since // HOUR * HOUR)
+        with self._cursor() as cursor:
+            cursor.execute(
+                self._sql(
+                    "SELECT hour, runs, passed, total_ms FROM validation_rollups"
+                    " WHERE target = {p} AND hour >= {p} ORDER BY hour"
+                ),
+                (target, since_hour),
+            )
+            hours = cursor.fetchall()
+            cursor.execute(
+                self._sql(
+                    "SELECT hour, le, runs FROM validation_rollup_latency"
+                    " WHERE target = {p} AND hour >= {p} ORDER BY hour, le"
+                ),
+                (target, since_hour),
+            )
+            buckets: Dict[int, List] = defaultdict(list)
+            for hour, le, runs in cursor.fetchall():
+                buckets[hour].append((le, runs))
+
+        return [
+            {
+                "hour": hour,
+                "runs": runs,
+                "pass_rate": round(passed / runs, 4),
+                "avg_ms": round(total_ms / runs, 2),
+                "p50_ms": get_percentile(buckets[hour], runs, 0.50),
+                "p95_ms": get_percentile(buckets[hour], runs, 0.95),
+                "p99_ms": get_percentile(buckets[hour], runs, 0.99),
+            }
+            for hour, runs, passed, total_ms in hours
+        ]
+
+
+class HistoryWriter:
+    """
+    Buffers history records in memory and writes them in batches
+    from a background task, so recording never waits for the database.
+
+    A batch is written every `flush_interval` seconds, or right away
+    once `batch_size` records are buffered. When more than `max_buffer`
+    records are waiting (the database is slow or down), the oldest are dropped.
+    """
+
+    def __init__(
+        self,
+        store: HistoryStore,
+        batch_size: int,
+        flush_interval: float,
+        max_buffer: int,
+    ):
+        self.store = store
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self._buffer: Deque[HistoryRecord] = deque()
+        self._ready = False
+        self._task: Optional[asyncio.Task] = None
+        self._full: Optional[asyncio.Event] = None
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    def record(self, record: HistoryRecord) -> None:
+        if len(self._buffer) >= self.max_buffer:
+            self._buffer.popleft()
+            HISTORY_RECORDS.inc("dropped")
+        self._buffer.append(record)
+
+        if self._task is None or self._task.done():
+            self._full = asyncio.Event()
+            self._task = asyncio.ensure_future(self._run())
+        if len(self._buffer) >= self.batch_size:
+            self._full.set()
+
+    async def flush(self) -> None:
+        while self._buffer:
+            size = min(self.batch_size, len(self._buffer))
+            batch = [self._buffer.popleft() for _ in range(size)]
+            try:
+                if not self._ready:
+                    await asyncio.to_thread(self.store.setup)
+                    self._ready = True
+                await asyncio.to_thread(self.store.write, batch)
+            except Exception:
+                LOGGER.exception("cannot write %s history records", len(batch))
+                HISTORY_RECORDS.inc("failed", amount=len(batch))
+            else:
+                HISTORY_RECORDS.inc("written", amount=len(batch))
+
+    async def aclose(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    async def _run(self) -> None:
+        while self._buffer:
+            try:
+                await asyncio.wait_for(self._full.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._full.clear()
+            await self.flush()
+
+
+_writer: Optional[HistoryWriter] = None
+
+
+def get_history() -> Optional[HistoryWriter]:
+    """
+    Returns the history writer of this process, or None if HISTORY_ENABLED is off.
+    Results are stored in DATABASE_URL if it is configured, otherwise in
+    the SQLite file HISTORY_SQLITE_PATH (by default in the temporary
+    directory), which all workers of this host share.
+    """
+
+    global _writer
+
+    settings = get_settings()
+    if _writer is None and settings.HISTORY_ENABLED:
+        pool = get_db_pool()
+        retention = settings.HISTORY_RETENTION
+        if pool is not None:
+            store = HistoryStore(pool, retention=retention)
+        else:
+            path = settings.HISTORY_SQLITE_PATH or str(
+                Path(tempfile.gettempdir()) / "validation_history.sqlite3"
+            )
+            store = HistoryStore(
+                create_sqlite_pool(path), placeholder="?", retention=retention
+            )
+
+        _writer = HistoryWriter(
+            store,
+            batch_size=settings.HISTORY_BATCH_SIZE,
+            flush_interval=settings.HISTORY_FLUSH_INTERVAL,
+            max_buffer=settings.HISTORY_MAX_BUFFER,
+        )
+
+    return _writer
+
+
+async def close_history() -> None:
+    if _writer is not None:
+        await _writer.aclose()
@@ -0,0 +1,174 @@
+import asyncio
+import logging
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict
+from typing import List
+from typing import Optional
+
+from framework.supported_api.blog.runner import run_validation
+from framework.utils.config import get_settings
+from framework.utils.db import get_db_pool
+from framework.utils.jobs import Job
+from framework.utils.jobs import JobStore
+from framework.utils.jobs import PostgresJobStore
+from framework.utils.jobs import SqliteJobStore
+
+LOGGER = logging.getLogger(__name__)
+
+# the longest pause of a worker after repeated errors of the store, in seconds
+MAX_BACKOFF = 30.0
+
+
+class JobQueue:
+    """
+    Runs validations in the background: `submit` stores a job and returns at once,
+    workers of every node sharing the store claim jobs and store their results.
+
+    Waiters are woken right away when a job finishes on this node,
+    and poll the store every `poll_interval` seconds for other nodes.
+    """
+
+    def __init__(self, store: JobStore, workers: int, poll_interval: float):
+        self.store = store
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._ready = False
+        self._wake = asyncio.Event()
+        self._waiters: Dict[str, asyncio.Event] = {}
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        await self._setup()
+        self._tasks = [asyncio.ensure_future(self._work()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, url: str, **params) -> Job:
+        await self._setup()
+        job = await asyncio.to_thread(self.store.submit, url, params)
+        self._wake.set()
+        return job
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        await self._setup()
+        return await asyncio.to_thread(self.store.get, job_id)
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[Job]:
+        """
+        Returns the job as soon as it is finished, or as it is after `timeout` seconds.
+        """
+
+        deadline = time.monotonic() + timeout
+        event = self._waiters.setdefault(job_id, asyncio.Event())
+        try:
+            while True:
+                job = await self.get(job_id)
+                remaining = deadline - time.monotonic()
+                if job is None or job.finished or remaining <= 0:
+                    return job
+
+                try:
+                    await asyncio.wait_for(
+                        event.wait(), min(remaining, self.poll_interval)
+                    )
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._waiters.pop(job_id, None)
+
+    async def _setup(self) -> None:
+        if not self._ready:
+            await asyncio.to_thread(self.store.setup)
+            self._ready = True
+
+    async def _work(self) -> None:
+        """
+        Claims and runs jobs until cancelled. An error (e.g. the store is down)
+        does not stop the worker: it is logged, and the worker backs off,
+        twice as long after each error in a row. A job which was claimed
+        but not finished is claimed again once its lease expires.
+        """
+
+        errors = 0
+        while True:
+            try:
+                ran = await self._work_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                errors += 1
+                delay = min(self.poll_interval * 2 ** errors, MAX_BACKOFF)
+                LOGGER.exception("job worker failed, retrying in %.1fs", delay)
+                await asyncio.sleep(delay)
+                continue
+
+            errors = 0
+            if not ran:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _work_once(self) -> bool:
+        self._wake.clear()
+        job = await asyncio.to_thread(self.store.claim)
+        if job is None:
+            return False
+
+        await self._run(job)
+        return True
+
+    async def _run(self, job: Job) -> None:
+        try:
+            resp = await run_validation(job.url, **job.params)
+        except asyncio.CancelledError:
+            await asyncio.to_thread(self.store.release, job.id)
+            raise
+
+        await asyncio.to_thread(self.store.finish, job.id, resp.dict())
+
+        event = self._waiters.get(job.id)
+        if event is not None:
+            event.set()
+
+
+_queue: Optional[JobQueue] = None
+
+
+def get_job_queue() -> JobQueue:
+    """
+    Returns the job queue of this process.
+    Jobs are stored in DATABASE_URL if it is configured, otherwise in
+    the SQLite file JOBS_SQLITE_PATH (by default in the temporary directory),
+    which all workers of this host share.
+    """
+
+    global _queue
+
+    if _queue is None:
+        settings = get_settings()
+        pool = get_db_pool()
+        if pool is not None:
+            store = PostgresJobStore(
+                pool,
+                lease=settings.JOBS_LEASE,
+                max_attempts=settings.JOBS_MAX_ATTEMPTS,
+            )
+        else:
+            path = settings.JOBS_SQLITE_PATH or str(
+                Path(tempfile.gettempdir()) / "validation_jobs.sqlite3"
+            )
+            store = SqliteJobStore(
+                path,
+                lease=settings.JOBS_LEASE,
+                max_attempts=settings.JOBS_MAX_ATTEMPTS,
+            )
+        _queue = JobQueue(store, settings.JOBS_WORKERS, settings.JOBS_POLL_INTERVAL)
+
+    return _queue
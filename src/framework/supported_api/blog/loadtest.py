@@ -0,0 +1,391 @@
+import asyncio
+import bisect
+import math
+import tempfile
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass
+from dataclasses import field
+from pathlib import Path
+from typing import Any
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+
+from framework.supported_api.blog.schemas.base import LoadTestRequest
+from framework.supported_api.blog.timings import BudgetExhausted
+from framework.supported_api.blog.timings import CallTiming
+from framework.supported_api.blog.timings import collect_timings
+from framework.supported_api.blog.timings import reserve_calls
+from framework.supported_api.blog.validate_api import create_new_post
+from framework.supported_api.blog.validate_api import delete_post
+from framework.supported_api.blog.validate_api import find_post_in_posts
+from framework.supported_api.blog.validate_api import generate_post_params
+from framework.supported_api.blog.validate_api import get_authors
+from framework.supported_api.blog.validate_api import get_post_by_id
+from framework.supported_api.blog.validate_api import validate_url
+from framework.utils.admission import Rejected
+from framework.utils.breaker import CircuitOpenError
+from framework.utils.config import get_settings
+from framework.utils.db import get_db_pool
+from framework.utils.dbpool import ConnectionPool
+from framework.utils.dbpool import create_sqlite_pool
+from framework.utils.http import get_origin
+from framework.utils.metrics import DEFAULT_BUCKETS
+
+BUCKETS_MS = [_bound * 1000 for _bound in DEFAULT_BUCKETS]
+
+
+def check_params(params: LoadTestRequest) -> List[str]:
+    """
+    Returns errors if the load test exceeds the configured caps.
+    """
+
+    settings = get_settings()
+    errors = []
+    if not 0 < params.users <= settings.LOADTEST_MAX_USERS:
+        errors.append(f"users must be 1..{settings.LOADTEST_MAX_USERS}")
+    if not 0 < params.duration <= settings.LOADTEST_MAX_DURATION:
+        errors.append(f"duration must be up to {settings.LOADTEST_MAX_DURATION}s")
+    if params.requests is not None and not (
+        0 < params.requests <= settings.LOADTEST_MAX_REQUESTS
+    ):
+        errors.append(f"requests must be 1..{settings.LOADTEST_MAX_REQUESTS}")
+    if not 0 <= params.ramp_up <= params.duration:
+        errors.append("ramp_up must be within the duration")
+    return errors
+
+
+@dataclass
+class EndpointStats:
+    latencies: List[float] = field(default_factory=list)
+    outcomes: Counter = field(default_factory=Counter)
+
+    def add(self, timing: CallTiming) -> None:
+        self.latencies.append(timing.network + timing.decode + timing.validation)
+        self.outcomes[timing.outcome] += 1
+
+    def report(self, elapsed: float) -> Dict:
+        requests = len(self.latencies)
+        latencies = sorted(self.latencies)
+        errors = requests - self.outcomes["ok"]
+
+        histogram = [0] * (len(DEFAULT_BUCKETS) + 1)
+        for latency in latencies:
+            histogram[bisect.bisect_left(DEFAULT_BUCKETS, latency)] += 1
+
+        return {
+            "requests": requests,
+            "throughput_rps": round(requests / elapsed, 2) if elapsed else 0.0,
+            "error_rate": round(errors / requests, 4) if requests else 0.0,
+            "schema_violation_rate": (
+                round(self.outcomes["invalid"] / requests, 4) if requests else 0.0
+            ),
+            "outcomes": dict(self.outcomes),
+            "latency_ms": {
+                "p50": _percentile_ms(latencies, 0.50),
+                "p95": _percentile_ms(latencies, 0.95),
+                "p99": _percentile_ms(latencies, 0.99),
+                "max": _percentile_ms(latencies, 1.0),
+            },
+            # the last bucket, with no upper bound, is for slower calls
+            "histogram": [
+                {"le_ms": _bound, "count": _count}
+                for _bound, _count in zip(BUCKETS_MS + [None], histogram)
+                if _count
+            ],
+        }
+
+
+def _percentile_ms(sorted_values: List[float], q: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(q * len(sorted_values)))
+    return round(sorted_values[index] * 1000, 2)
+
+
+class LoadTest:
+    """
+    Runs the validation scenario in a loop from `users` concurrent virtual users
+    for `duration` seconds, or until `requests` calls are made
+    (LOADTEST_MAX_REQUESTS at most). Users start evenly over `ramp_up` seconds.
+
+    Each call is reserved from the request budget before it is sent, and
+    a user stops at the first call refused, so the budget is never exceeded.
+    The deletion of a post is reserved along with its creation: posts
+    created by the test are always deleted.
+    The test stops early once the circuit of the target opens.
+    """
+
+    def __init__(self, params: LoadTestRequest):
+        self.params = params
+        self.endpoints: Dict[str, EndpointStats] = {}
+        self.iterations: Counter = Counter()
+        self.calls = 0
+        self.reserved = 0
+        self.aborted: Optional[str] = None
+        self.budget = min(
+            params.requests or get_settings().LOADTEST_MAX_REQUESTS,
+            get_settings().LOADTEST_MAX_REQUESTS,
+        )
+
+    async def run(self) -> Dict:
+        started = time.monotonic()
+        deadline = started + self.params.duration
+        step = self.params.ramp_up / self.params.users
+
+        users = [
+            asyncio.ensure_future(self._user(_i * step, deadline))
+            for _i in range(self.params.users)
+        ]
+        try:
+            await asyncio.gather(*users)
+        finally:
+            for user in users:
+                user.cancel()
+
+        return self.report(time.monotonic() - started)
+
+    def report(self, elapsed: float) -> Dict:
+        return {
+            "url": self.params.url,
+            "users": self.params.users,
+            "elapsed_s": round(elapsed, 3),
+            "requests": self.calls,
+            "throughput_rps": round(self.calls / elapsed, 2) if elapsed else 0.0,
+            "iterations": dict(self.iterations),
+            "aborted": self.aborted,
+            "endpoints": {
+                _name: _stats.report(elapsed)
+                for _name, _stats in self.endpoints.items()
+            },
+        }
+
+    def _exhausted(self, deadline: float) -> bool:
+        return (
+            self.aborted is not None
+            or time.monotonic() >= deadline
+            or self.reserved >= self.budget
+        )
+
+    def _reserve(self, step: str) -> bool:
+        if step == "cleanup":
+            return True
+
+        needed = 2 if step == "create" else 1
+        if self.reserved + needed > self.budget:
+            return False
+        self.reserved += needed
+        return True
+
+    async def _user(self, delay: float, deadline: float) -> None:
+        await asyncio.sleep(delay)
+        stopped = False
+        while not stopped and not self._exhausted(deadline):
+            with collect_timings() as timings, reserve_calls(self._reserve):
+                try:
+                    await self._iteration()
+                except BudgetExhausted:
+                    stopped = True
+                    self.iterations["stopped"] += 1
+                except CircuitOpenError:
+                    self.aborted = "the target API is down"
+                    self.iterations["failed"] += 1
+                except Exception:
+                    self.iterations["failed"] += 1
+                else:
+                    self.iterations["ok"] += 1
+
+            for timing in timings:
+                self.calls += 1
+                stats = self.endpoints.setdefault(timing.step, EndpointStats())
+                stats.add(timing)
+
+    async def _iteration(self) -> None:
+        url = self.params.url
+        authors = await get_authors(url)
+        post = await create_new_post(url, generate_post_params(authors[0]))
+        try:
+            await find_post_in_posts(url, post)
+            await get_post_by_id(url, post.id)
+        finally:
+            # unlike a validation, a load test creates many posts: never leave them
+            await delete_post(url, post.id)
+
+
+class LoadTestLedger:
+    """
+    Load tests started by all workers sharing the database, so that limits
+    hold for the whole service rather than per worker process: at most
+    `max_running` tests run at once, and a target is load-tested
+    at most once per `cooldown` seconds.
+
+    A test which has not been finished (its worker died) stops counting
+    as running twice `max_duration` seconds after its start.
+    Calls are blocking: run them in a thread from async code.
+    """
+
+    ddl = """
+        CREATE TABLE IF NOT EXISTS load_tests (
+            id TEXT PRIMARY KEY,
+            target TEXT NOT NULL,
+            started_at DOUBLE PRECISION NOT NULL,
+            finished_at DOUBLE PRECISION
+        )
+    """
+
+    def __init__(
+        self,
+        pool: ConnectionPool,
+        max_running: int,
+        max_duration: float,
+        cooldown: float,
+        placeholder: str = "%s",
+        lock: str = "LOCK TABLE load_tests IN SHARE ROW EXCLUSIVE MODE",
+    ):
+        self.pool = pool
+        self.max_running = max_running
+        self.max_duration = max_duration
+        self.cooldown = cooldown
+        self.placeholder = placeholder
+        self.lock = lock
+        self._ready = False
+
+    def _sql(self, query: str) -> str:
+        return query.format(p=self.placeholder)
+
+    @contextmanager
+    def _transaction(self) -> Iterator[Any]:
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            try:
+                if not self._ready:
+                    cursor.execute(self.ddl)
+                    connection.commit()
+                    self._ready = True
+                # starts are serialized, so two workers never both take the last slot
+                cursor.execute(self.lock)
+                yield cursor
+            finally:
+                cursor.close()
+
+    def start(self, target: str) -> str:
+        """
+        Registers a load test of the target and returns its id,
+        or raises Rejected if it is not allowed now.
+        """
+
+        now = time.time()
+        stale_after = 2 * self.max_duration
+        with self._transaction() as cursor:
+            cursor.execute(
+                self._sql("DELETE FROM load_tests WHERE started_at < {p}"),
+                (now - max(stale_after, self.cooldown),),
+            )
+
+            cursor.execute(
+                self._sql(
+                    "SELECT COUNT(*), MIN(started_at) FROM load_tests"
+                    " WHERE finished_at IS NULL AND started_at >= {p}"
+                ),
+                (now - stale_after,),
+            )
+            running, oldest = cursor.fetchone()
+            if running >= self.max_running:
+                raise Rejected(
+                    429,
+                    "too many load tests are running, try again later",
+                    _retry_after(oldest + self.max_duration - now),
+                )
+
+            cursor.execute(
+                self._sql("SELECT MAX(started_at) FROM load_tests WHERE target = {p}"),
+                (target,),
+            )
+            (last,) = cursor.fetchone()
+            if last is not None and now - last < self.cooldown:
+                raise Rejected(
+                    429,
+                    f"{target} has been load-tested recently, try again later",
+                    _retry_after(last + self.cooldown - now),
+                )
+
+            test_id = uuid.uuid4().hex
+            cursor.execute(
+                self._sql(
+                    "INSERT INTO load_tests (id, target, started_at)"
+                    " VALUES ({p}, {p}, {p})"
+                ),
+                (test_id, target, now),
+            )
+        return test_id
+
+    def finish(self, test_id: str) -> None:
+        with self._transaction() as cursor:
+            cursor.execute(
+                self._sql("UPDATE load_tests SET finished_at = {p} WHERE id = {p}"),
+                (time.time(), test_id),
+            )
+
+
+def _retry_after(seconds: float) -> int:
+    return max(1, math.ceil(seconds))
+
+
+_ledger: Optional[LoadTestLedger] = None
+
+
+def get_load_test_ledger() -> LoadTestLedger:
+    """
+    Returns the ledger of load tests, in DATABASE_URL if it is configured,
+    otherwise in the SQLite file LOADTEST_SQLITE_PATH (by default in
+    the temporary directory), which all workers of this host share.
+    """
+
+    global _ledger
+
+    if _ledger is None:
+        settings = get_settings()
+        params = dict(
+            max_running=settings.LOADTEST_MAX_RUNNING,
+            max_duration=settings.LOADTEST_MAX_DURATION,
+            cooldown=settings.LOADTEST_COOLDOWN,
+        )
+        pool = get_db_pool()
+        if pool is not None:
+            _ledger = LoadTestLedger(pool, **params)
+        else:
+            path = settings.LOADTEST_SQLITE_PATH or str(
+                Path(tempfile.gettempdir()) / "validation_load_tests.sqlite3"
+            )
+            _ledger = LoadTestLedger(
+                create_sqlite_pool(path),
+                placeholder="?",
+                lock="BEGIN IMMEDIATE",
+                **params,
+            )
+
+    return _ledger
+
+
+async def run_load_test(params: LoadTestRequest) -> Dict:
+    """
+    Runs a load test if the limits of LoadTestLedger allow it.
+    Raises ValueError if the parameters exceed the caps,
+    and Rejected if the load test is not allowed now.
+    """
+
+    errors = check_params(params)
+    if errors:
+        raise ValueError("; ".join(errors))
+    validate_url(params.url)
+
+    ledger = get_load_test_ledger()
+    test_id = await asyncio.to_thread(ledger.start, get_origin(params.url))
+    try:
+        return await LoadTest(params).run()
+    finally:
+        await asyncio.to_thread(ledger.finish, test_id)
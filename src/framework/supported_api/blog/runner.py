@@ -0,0 +1,235 @@
+import asyncio
+import logging
+import time
+import traceback
+from typing import AsyncIterator
+from typing import Iterable
+from typing import Optional
+from typing import Tuple
+from urllib.parse import urlsplit
+from urllib.parse import urlunsplit
+
+from framework.supported_api.blog.failures import Failure
+from framework.supported_api.blog.failures import TARGET_ERRORS
+from framework.supported_api.blog.history import get_history
+from framework.supported_api.blog.history import HistoryRecord
+from framework.supported_api.blog.schemas.base import JsonApiObject
+from framework.supported_api.blog.timings import collect_timings
+from framework.supported_api.blog.validate_api import test_post_global
+from framework.utils.admission import admitted
+from framework.utils.admission import Rejected
+from framework.utils.cache import ResultCache
+from framework.utils.cassette import recording
+from framework.utils.cassette import save_cassette
+from framework.utils.config import get_settings
+from framework.utils.config import Settings
+from framework.utils.config import subscribe
+from framework.utils.metrics import REGISTRY
+
+LOGGER = logging.getLogger(__name__)
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+_cache: Optional[ResultCache] = None
+
+
+def get_cache() -> Optional[ResultCache]:
+    """
+    Returns the result cache of this process, or None if caching is disabled.
+    """
+
+    global _cache
+
+    settings = get_settings()
+    if _cache is None and settings.RESULT_CACHE_TTL > 0:
+        _cache = ResultCache(
+            ttl=settings.RESULT_CACHE_TTL,
+            max_size=settings.RESULT_CACHE_SIZE,
+        )
+
+    return _cache
+
+
+def _drop_cache_on_change(old: Settings, new: Settings) -> None:
+    global _cache
+
+    if {"RESULT_CACHE_SIZE", "RESULT_CACHE_TTL"} & set(old.changed(new)):
+        _cache = None
+
+
+subscribe(_drop_cache_on_change)
+
+
+def _get_cache_stats():
+    cache = get_cache()
+    if cache is None:
+        return {}
+    return {(_name,): _value for _name, _value in cache.stats().items()}
+
+
+REGISTRY.gauge(
+    "validation_cache",
+    "Result cache counters and sizes.",
+    _get_cache_stats,
+    labels=("stat",),
+)
+
+
+def normalize_url(url: str) -> str:
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        # an invalid url is kept as is, to be reported by validate_url
+        return url.strip()
+
+    scheme = parts.scheme.lower()
+    netloc = (parts.hostname or "").lower()
+    if port and port != _DEFAULT_PORTS.get(scheme):
+        netloc = f"{netloc}:{port}"
+    if parts.username:
+        netloc = f"{parts.username}@{netloc}"
+    path = parts.path.rstrip("/")
+    return urlunsplit((scheme, netloc, path, parts.query, ""))
+
+
+async def run_validation(
+    test_api_server: str,
+    fresh: bool = False,
+    timings: bool = False,
+    tb: bool = False,
+) -> JsonApiObject:
+    """
+    Validates the server, serving a recent result from the cache if there is one.
+
+    :param test_api_server: url of the server to validate
+    :param fresh: do not use a cached result
+    :param timings: keep the per-step timings section in the result
+    :param tb: add the traceback of a failure to the result
+    :return: the validation result
+    """
+
+    cache = get_cache()
+    if cache is None:
+        resp = await validate(test_api_server)
+    else:
+        resp = await cache.get_or_compute(
+            normalize_url(test_api_server),
+            lambda: validate(test_api_server),
+            fresh=fresh,
+            cacheable=lambda _resp: _resp.data is not None,
+        )
+
+    if resp.data is None:
+        return resp
+
+    data = dict(resp.data)
+    if not timings:
+        data.pop("timings", None)
+
+    failure = data["failure"]
+    if failure is not None:
+        data["failure"] = failure.report()
+        data["tb"] = failure.format_traceback() if tb else None
+
+    return JsonApiObject(data=data, errors=resp.errors)
+
+
+async def validate(test_api_server: str) -> JsonApiObject:
+    """
+    Runs the scenario and builds a result, always with a timings section:
+    collecting timings is cheap, and a cached result may be requested with them.
+    A failure is kept as a Failure object, to be reported by run_validation.
+    The result is also recorded in the validation history, and exchanges
+    with the target in a cassette if CASSETTE_RECORD_DIR is set.
+    """
+
+    started = time.perf_counter()
+
+    with collect_timings() as collected, recording(test_api_server) as cassette:
+        resp = await _validate(test_api_server)
+
+    if cassette is not None:
+        try:
+            path = await save_cassette(cassette)
+        except OSError:
+            LOGGER.exception("cannot save the cassette of %s", test_api_server)
+        else:
+            if resp.data is not None:
+                resp.data["cassette"] = path.name
+
+    total_ms = round((time.perf_counter() - started) * 1000, 2)
+    if resp.data is not None:
+        resp.data["timings"] = {
+            "total_ms": total_ms,
+            "steps": [_timing.report() for _timing in collected],
+        }
+
+    history = get_history()
+    if history is not None:
+        target = normalize_url(test_api_server)
+        history.record(HistoryRecord.from_result(target, resp, total_ms))
+
+    return resp
+
+
+async def _validate(test_api_server: str) -> JsonApiObject:
+    resp = JsonApiObject()
+
+    try:
+        await test_post_global(test_api_server)
+    except TARGET_ERRORS as err:
+        # a broken target is the usual case: no stack formatting here
+        failure = Failure.from_error(err)
+        resp.data = {
+            "ok": False,
+            "description": failure.description,
+            "failure": failure,
+            "tb": None,
+        }
+    except Exception as err:
+        tb = traceback.format_exc()
+        resp.errors = ["our server fault", str(err), tb]
+    else:
+        resp.data = {
+            "ok": True,
+            "description": "hemos pasado",
+            "failure": None,
+            "tb": None,
+        }
+
+    return resp
+
+
+async def run_batch(
+    urls: Iterable[str],
+    concurrency: Optional[int] = None,
+    client: str = "",
+) -> AsyncIterator[Tuple[str, JsonApiObject]]:
+    """
+    Validates many servers at once, yielding results in order of completion.
+    At most `concurrency` scenarios are in flight at the same time,
+    and each is admitted as a request of the `client`.
+    Unfinished validations are cancelled when the consumer stops iterating.
+    """
+
+    if concurrency is None:
+        concurrency = get_settings().BATCH_CONCURRENCY
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run_one(url: str) -> Tuple[str, JsonApiObject]:
+        async with semaphore:
+            try:
+                async with admitted(client):
+                    return url, await run_validation(url)
+            except Rejected as err:
+                return url, JsonApiObject(errors=[err.reason])
+
+    tasks = [asyncio.ensure_future(run_one(url)) for url in urls]
+
+    try:
+        for future in asyncio.as_completed(tasks):
+            yield await future
+    finally:
+        for task in tasks:
+            task.cancel()
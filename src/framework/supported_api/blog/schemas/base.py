@@ -9,6 +9,9 @@ from pydantic import BaseModel
 
 class TestRequest(BaseModel):
     url: str
+    fresh: bool = False
+    timings: bool = False
+    tb: bool = False
 
 
 class JsonApiObject(BaseModel):
@@ -18,3 +21,24 @@ class JsonApiObject(BaseModel):
 
 class TestRequestApi(JsonApiObject):
     data: TestRequest
+
+
+class BatchRequest(BaseModel):
+    urls: List[str]
+    concurrency: Optional[int] = None
+
+
+class BatchRequestApi(JsonApiObject):
+    data: BatchRequest
+
+
+class LoadTestRequest(BaseModel):
+    url: str
+    users: int = 5
+    duration: float = 10
+    requests: Optional[int] = None
+    ramp_up: float = 0
+
+
+class LoadTestRequestApi(JsonApiObject):
+    data: LoadTestRequest
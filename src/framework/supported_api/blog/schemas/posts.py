@@ -1,3 +1,4 @@
+from typing import Dict
 from typing import List
 from typing import Optional
 
@@ -17,6 +18,7 @@ PostList = List[Post]
 
 class PostListApi(JsonApiObject):
     data: PostList
+    links: Optional[Dict] = None
 
 
 class PostApi(JsonApiObject):
@@ -0,0 +1,229 @@
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from dataclasses import field
+from typing import AsyncIterator
+from typing import Callable
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+
+import httpx
+from pydantic import ValidationError
+
+from framework.utils.breaker import CircuitOpenError
+from framework.utils.metrics import REGISTRY
+from framework.utils.metrics import SIZE_BUCKETS
+
+_LABELS = ("step", "outcome")
+
+NETWORK_SECONDS = REGISTRY.histogram(
+    "blog_api_network_seconds",
+    "Time spent exchanging data with the target API.",
+    _LABELS,
+)
+RESPONSE_BYTES = REGISTRY.histogram(
+    "blog_api_response_bytes",
+    "Size of target API response bodies.",
+    _LABELS,
+    buckets=SIZE_BUCKETS,
+)
+DECODE_SECONDS = REGISTRY.histogram(
+    "blog_api_decode_seconds",
+    "Time spent decoding JSON of target API responses.",
+    _LABELS,
+)
+VALIDATION_SECONDS = REGISTRY.histogram(
+    "blog_api_validation_seconds",
+    "Time spent validating target API responses against schemas.",
+    _LABELS,
+)
+
+_CONNECT_EVENTS = ("connection.connect_tcp", "connection.start_tls")
+_HEADERS_EVENTS = (
+    "http11.receive_response_headers.complete",
+    "http2.receive_response_headers.complete",
+)
+
+_collected: ContextVar[Optional[List["CallTiming"]]] = ContextVar(
+    "collected_timings", default=None
+)
+_reserve: ContextVar[Optional[Callable[[str], bool]]] = ContextVar(
+    "reserve_call", default=None
+)
+
+
+class BudgetExhausted(Exception):
+    """
+    A call was refused by the call budget of its context: it has not been sent.
+    """
+
+
+def get_outcome(err: Optional[BaseException]) -> str:
+    if err is None:
+        return "ok"
+    if isinstance(err, CircuitOpenError):
+        return "circuit_open"
+    if isinstance(err, AssertionError):
+        return "failed"
+    if isinstance(err, httpx.TimeoutException):
+        return "timeout"
+    if isinstance(err, httpx.TransportError):
+        return "down"
+    if isinstance(err, ValidationError):
+        return "invalid"
+    if isinstance(err, asyncio.CancelledError):
+        return "cancelled"
+    return "error"
+
+
+@dataclass
+class CallTiming:
+    """
+    Timings of one target API call within a scenario step.
+
+    `network` is split into `connect` (TCP + TLS, zero for a reused connection),
+    `ttfb` (waiting for response headers) and `transfer` (receiving the body)
+    using httpcore trace events; see `trace`.
+    """
+
+    step: str
+    outcome: str = "ok"
+    network: float = 0.0
+    size: int = 0
+    decode: float = 0.0
+    validation: float = 0.0
+    connect: float = 0.0
+    _started: float = field(default_factory=time.perf_counter, repr=False)
+    _mark: float = field(default_factory=time.perf_counter, repr=False)
+    _connect_started: float = field(default=0.0, repr=False)
+    _headers_at: Optional[float] = field(default=None, repr=False)
+
+    @property
+    def ttfb(self) -> float:
+        if self._headers_at is None:
+            return max(0.0, self.network - self.connect)
+        return max(0.0, self._headers_at - self._started - self.connect)
+
+    @property
+    def transfer(self) -> float:
+        return max(0.0, self.network - self.connect - self.ttfb)
+
+    @property
+    def parse(self) -> float:
+        return self.decode + self.validation
+
+    def report(self) -> Dict:
+        return {
+            "step": self.step,
+            "outcome": self.outcome,
+            "connect_ms": _ms(self.connect),
+            "ttfb_ms": _ms(self.ttfb),
+            "transfer_ms": _ms(self.transfer),
+            "parse_ms": _ms(self.parse),
+            "size": self.size,
+        }
+
+    async def trace(self, event: str, _info: Dict) -> None:
+        """
+        A httpcore trace callback: pass it as `extensions={"trace": timing.trace}`.
+        """
+
+        now = time.perf_counter()
+        if event.startswith(_CONNECT_EVENTS):
+            if event.endswith(".started"):
+                self._connect_started = now
+            else:
+                self.connect += now - self._connect_started
+        elif event in _HEADERS_EVENTS:
+            self._headers_at = now
+
+    def lap(self) -> float:
+        """
+        Returns seconds passed since the previous lap (or creation).
+        """
+
+        now = time.perf_counter()
+        elapsed = now - self._mark
+        self._mark = now
+        return elapsed
+
+    async def metered(self, chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        """
+        Passes body chunks through, adding the time spent waiting for them
+        to `network` and their size to `size`.
+        """
+
+        while True:
+            started = time.perf_counter()
+            try:
+                chunk = await chunks.__anext__()
+            except StopAsyncIteration:
+                self.network += time.perf_counter() - started
+                return
+            self.network += time.perf_counter() - started
+            self.size += len(chunk)
+            yield chunk
+
+    def record(self) -> None:
+        labels = (self.step, self.outcome)
+        NETWORK_SECONDS.observe(self.network, *labels)
+        RESPONSE_BYTES.observe(self.size, *labels)
+        DECODE_SECONDS.observe(self.decode, *labels)
+        VALIDATION_SECONDS.observe(self.validation, *labels)
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 2)
+
+
+@contextmanager
+def collect_timings() -> Iterator[List[CallTiming]]:
+    """
+    Collects timings of all calls made in this context,
+    including tasks started from it.
+    """
+
+    timings = []
+    token = _collected.set(timings)
+    try:
+        yield timings
+    finally:
+        _collected.reset(token)
+
+
+@contextmanager
+def reserve_calls(reserve: Callable[[str], bool]) -> Iterator[None]:
+    """
+    Asks `reserve` before each call made in this context, including tasks
+    started from it, is sent: a call it refuses raises BudgetExhausted.
+    """
+
+    token = _reserve.set(reserve)
+    try:
+        yield
+    finally:
+        _reserve.reset(token)
+
+
+@contextmanager
+def measure_call(step: str) -> Iterator[CallTiming]:
+    reserve = _reserve.get()
+    if reserve is not None and not reserve(step):
+        raise BudgetExhausted(f"no call budget left for {step}")
+
+    timing = CallTiming(step)
+    collected = _collected.get()
+    if collected is not None:
+        collected.append(timing)
+
+    try:
+        yield timing
+    except BaseException as err:
+        timing.outcome = get_outcome(err)
+        raise
+    finally:
+        timing.record()
@@ -1,70 +1,132 @@
 import os
+import time
+from typing import Any
 from typing import Dict
+from typing import Optional
 from typing import Text
+from typing import Tuple
 from typing import Type
 from typing import Union
+from urllib.parse import urlencode
+from urllib.parse import urljoin
 
-import requests
+import httpx
 import validators
 from pydantic import BaseModel
 
+from framework.supported_api.blog.failures import CheckFailed
 from framework.supported_api.blog.schemas.base import JsonApiObject
 from framework.supported_api.blog.schemas.posts import Post
 from framework.supported_api.blog.schemas.posts import PostApi
-from framework.supported_api.blog.schemas.posts import PostList
 from framework.supported_api.blog.schemas.posts import PostListApi
 from framework.supported_api.blog.schemas.users import User
 from framework.supported_api.blog.schemas.users import UserList
 from framework.supported_api.blog.schemas.users import UserListApi
-from framework.utils.settings import get_setting
-
-API_TIMEOUT = get_setting("API_TIMEOUT")
+from framework.supported_api.blog.timings import CallTiming
+from framework.supported_api.blog.timings import measure_call
+from framework.utils.breaker import get_health_tracker
+from framework.utils.config import get_settings
+from framework.utils.fastschema import CompiledModel
+from framework.utils.http import get_pool
+from framework.utils.jsonstream import iter_array_items
+from framework.utils.scenario import run_steps
+from framework.utils.scenario import Step
+
+COMPILED_SCHEMAS = {
+    _schema: CompiledModel(_schema)
+    for _schema in (Post, PostApi, PostListApi, UserListApi)
+}
+
+
+async def test_post_global(test_api_server):
+    validate_url(test_api_server)
+    await run_steps(SCENARIO, test_api_server)
 
 
-def test_post_global(test_api_server):
-    validate_url(test_api_server)
-    authors = get_authors(test_api_server)
+async def step_authors(server: Text, _results: Dict) -> User:
+    authors = await get_authors(server)
     # TODO: validate that authors != []
-    author = authors[0]
+    return authors[0]
+
 
-    post_params = generate_post_params(author)
-    new_post = create_new_post(test_api_server, post_params)
+async def step_create(server: Text, results: Dict) -> Post:
+    post_params = generate_post_params(results["authors"])
+    new_post = await create_new_post(server, post_params)
     validate_post(new_post, post_params)
+    return new_post
 
-    posts = get_all_posts(test_api_server)
-    validate_post_in_posts(new_post, posts)
 
-    existing_post = get_post_by_id(test_api_server, new_post.id)
+async def step_list(server: Text, results: Dict) -> None:
+    await find_post_in_posts(server, results["create"])
+
+
+async def step_get_by_id(server: Text, results: Dict) -> None:
+    new_post = results["create"]
+    existing_post = await get_post_by_id(server, new_post.id)
     validate_post(existing_post, new_post)
 
 
-def call_api(
+async def step_cleanup(server: Text, results: Dict) -> None:
+    if get_settings().API_CLEANUP_POSTS:
+        await delete_post(server, results["create"].id)
+
+
+SCENARIO = (
+    Step("authors", step_authors),
+    Step("create", step_create, depends=("authors",)),
+    Step("list", step_list, depends=("create",)),
+    Step("get_by_id", step_get_by_id, depends=("create",)),
+    Step("cleanup", step_cleanup, depends=("list", "get_by_id")),
+)
+
+
+async def call_api(
     url: str,
     method: str,
-    schema: Type[JsonApiObject],
+    schema: Optional[Type[JsonApiObject]],
     json: Dict = None,
-    expected_status: int = 200,
-) -> JsonApiObject:
-    meth = getattr(requests, method)
-    meth_kwargs = dict(timeout=API_TIMEOUT)
+    expected_status: Union[int, Tuple[int, ...]] = 200,
+    step: str = "call",
+) -> Optional[JsonApiObject]:
+    meth_kwargs = {}
 
     if json:
         meth_kwargs["json"] = json
 
-    response = meth(url, **meth_kwargs)
-    assert (
-        response.status_code == expected_status
-    ), f"{url} does not work: {response.status_code}, expected: {expected_status}"
-    payload = response.json()
+    with measure_call(step) as timing:
+        meth_kwargs["extensions"] = {"trace": timing.trace}
+        async with get_pool().client(url) as client:
+            with get_health_tracker().call(url, step) as timeout:
+                response = await client.request(
+                    method.upper(), url, timeout=timeout, **meth_kwargs
+                )
+        timing.network = timing.lap()
+        timing.size = len(response.content)
 
-    obj = schema.parse_obj(payload)
+        validate_status(url, response.status_code, expected_status)
+        if schema is None:
+            return None
+
+        payload = response.json()
+        timing.decode = timing.lap()
+
+        obj = parse_payload(schema, payload)
+        timing.validation = timing.lap()
 
     return obj
 
 
-def get_post_by_id(server: Text, new_post: int) -> Post:
+def parse_payload(schema: Type[BaseModel], payload: Any) -> BaseModel:
+    compiled = COMPILED_SCHEMAS.get(schema)
+    if compiled is None:
+        return schema.parse_obj(payload)
+
+    return compiled.parse(payload)
+
+
+async def get_post_by_id(server: Text, new_post: int) -> Post:
     url = f"{server}/api/v1/blog/post/{new_post}"
-    obj = call_api(url, "get", schema=PostApi)
+    obj = await call_api(url, "get", schema=PostApi, step="get_by_id")
     return obj.data
 
 
@@ -74,44 +136,191 @@ def generate_post_params(author: User) -> Dict:
     return params
 
 
-def get_all_posts(server: Text) -> PostList:
-    url = f"{server}/api/v1/blog/post/"
-    obj = call_api(url, "get", schema=PostListApi)
-    return obj.data
+def get_posts_url(server: Text) -> str:
+    """
+    Returns the URL of the first page of the post list,
+    with the page size and the sort order from the settings, if any.
+    """
 
+    settings = get_settings()
+    params = {}
+    if settings.API_PAGE_SORT:
+        params["sort"] = settings.API_PAGE_SORT
+    if settings.API_PAGE_SIZE:
+        params["page[size]"] = settings.API_PAGE_SIZE
 
-def validate_post_in_posts(new_post: Post, posts: PostList) -> None:
-    assert new_post in posts
-
-
-def get_authors(server: Text) -> UserList:
+    url = f"{server}/api/v1/blog/post/"
+    return f"{url}?{urlencode(params)}" if params else url
+
+
+def get_next_link(links: Optional[Dict]) -> Optional[str]:
+    # a JSON:API link is either a URL or an object with `href`
+    link = (links or {}).get("next")
+    if isinstance(link, dict):
+        link = link.get("href")
+    return link if isinstance(link, str) and link else None
+
+
+async def find_post_in_posts(server: Text, new_post: Post) -> None:
+    """
+    Looks for the new post in the post list, page by page:
+    pages are fetched one at a time following JSON:API `links.next`,
+    and the search stops at the page holding the post.
+    With API_PAGE_SORT set to newest first (e.g. "-id") that is the first page,
+    so the cost does not grow with the number of posts on the target.
+
+    At most API_MAX_PAGES pages are read. With API_STREAM_POSTS,
+    a page is validated post by post while it is still being received.
+    """
+
+    settings = get_settings()
+    url = get_posts_url(server)
+    found = False
+    pages = 0
+
+    while not found and url and pages < settings.API_MAX_PAGES:
+        pages += 1
+        if settings.API_STREAM_POSTS:
+            with measure_call("list") as timing:
+                found, next_url = await stream_posts(url, new_post, timing)
+        else:
+            obj = await call_api(url, "get", schema=PostListApi, step="list")
+            found, next_url = new_post in obj.data, get_next_link(obj.links)
+
+        url = next_url and urljoin(url, next_url)
+
+    if not found:
+        raise CheckFailed(
+            f"post {new_post.id} is not in the first {pages} page(s)"
+            f" of the post list of {server}",
+            kind="missing",
+            expected=new_post.id,
+        )
+
+
+async def stream_posts(
+    url: str, new_post: Post, timing: CallTiming
+) -> Tuple[bool, Optional[str]]:
+    """
+    Reads a page of the post list while it is being received.
+    The whole exchange, body included, is tracked by the health tracker:
+    a timeout or a reset while receiving the body is a failure of the host.
+    """
+
+    members: Dict[str, Any] = {}
+    error: Optional[Exception] = None
+
+    async with get_pool().client(url) as client:
+        extensions = {"trace": timing.trace}
+        with get_health_tracker().call(url, "list") as timeout:
+            request = client.build_request(
+                "GET", url, timeout=timeout, extensions=extensions
+            )
+            response = await client.send(request, stream=True)
+            try:
+                found = await read_posts(response, new_post, timing, members)
+            except (httpx.TimeoutException, httpx.NetworkError):
+                raise
+            except Exception as err:
+                # the host has answered: a broken answer does not mean it is down
+                error = err
+            finally:
+                await response.aclose()
+
+    if error is not None:
+        raise error
+
+    return found, get_next_link(members.get("links"))
+
+
+async def read_posts(
+    response: httpx.Response, new_post: Post, timing: CallTiming, members: Dict
+) -> bool:
+    headers_time = timing.network = timing.lap()
+    validate_status(str(response.url), response.status_code, 200)
+
+    found = False
+    chunks = timing.metered(response.aiter_bytes())
+    async for item in iter_array_items(chunks, "data", members):
+        started = time.perf_counter()
+        post = parse_payload(Post, item)
+        timing.validation += time.perf_counter() - started
+        if post == new_post:
+            found = True
+            break
+
+    # the rest of the body time was spent in the JSON parser
+    body_time = timing.lap() - (timing.network - headers_time)
+    timing.decode = body_time - timing.validation
+    return found
+
+
+async def get_authors(server: Text) -> UserList:
     url = f"{server}/api/v1/user/"
-    obj = call_api(url, "get", schema=UserListApi)
+    obj = await call_api(url, "get", schema=UserListApi, step="authors")
     return obj.data
 
 
 def validate_post(post: Post, post_params: Union[Dict, Post]) -> None:
     post_params = post_params.dict() if isinstance(post_params, Post) else post_params
 
-    assert isinstance(
-        post.id, int
-    ), f"post object must have an integer id, got {post.id!r} instead"
+    if not isinstance(post.id, int):
+        raise CheckFailed(
+            f"post object must have an integer id, got {post.id!r} instead",
+            kind="type",
+            expected="int",
+            actual=post.id,
+        )
 
     for attr_name, expected_value in post_params.items():
         existing_value = getattr(post, attr_name)
-        assert (
-            existing_value == expected_value
-        ), f"post.{attr_name} == {existing_value!r}, while expected {existing_value!r}"
+        if existing_value != expected_value:
+            raise CheckFailed(
+                f"post.{attr_name} == {existing_value!r},"
+                f" while expected {expected_value!r}",
+                kind="value",
+                expected=expected_value,
+                actual=existing_value,
+            )
 
 
-def create_new_post(server: Text, new_post_params: Dict) -> Post:
+async def create_new_post(server: Text, new_post_params: Dict) -> Post:
     url = f"{server}/api/v1/blog/post/"
     request = PostApi(data=Post.parse_obj(new_post_params))
-    obj = call_api(
-        url, "post", json=request.dict(), expected_status=201, schema=PostApi
+    obj = await call_api(
+        url,
+        "post",
+        json=request.dict(),
+        expected_status=201,
+        schema=PostApi,
+        step="create",
     )
     return obj.data
 
 
+async def delete_post(server: Text, post_id: int) -> None:
+    url = f"{server}/api/v1/blog/post/{post_id}"
+    await call_api(
+        url, "delete", schema=None, expected_status=(200, 202, 204), step="cleanup"
+    )
+
+
+def validate_status(
+    url: str, status_code: int, expected_status: Union[int, Tuple[int, ...]]
+) -> None:
+    expected = (
+        expected_status if isinstance(expected_status, tuple) else (expected_status,)
+    )
+    if status_code not in expected:
+        raise CheckFailed(
+            f"{url} does not work: {status_code}, expected: {expected_status}",
+            kind="status",
+            expected=list(expected),
+            actual=status_code,
+            status=status_code,
+        )
+
+
 def validate_url(server) -> None:
-    assert validators.url(server), f"url {server} is not valid"
+    if not validators.url(server):
+        raise CheckFailed(f"url {server} is not valid", kind="url", actual=server)
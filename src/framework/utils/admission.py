@@ -0,0 +1,233 @@
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from dataclasses import field
+from typing import AsyncIterator
+from typing import Dict
+from typing import List
+from typing import Optional
+
+from framework.utils.config import get_settings
+from framework.utils.metrics import REGISTRY
+
+ADMISSION_REJECTED = REGISTRY.counter(
+    "admission_rejected",
+    "Requests rejected by admission control, by reason.",
+    labels=("reason",),
+)
+
+
+class Rejected(Exception):
+    """
+    Raised when a request is not admitted; `retry_after` is in seconds.
+    """
+
+    def __init__(self, status_code: int, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+@dataclass(order=True)
+class _Waiter:
+    tag: float
+    seq: int
+    client: str = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+
+
+class AdmissionController:
+    """
+    Limits the number of requests served at once,
+    sharing slots fairly between clients.
+
+    At most `max_inflight` requests run; up to `max_queue` more wait
+    for a free slot, each for at most `queue_timeout` seconds,
+    and at most `max_queue_per_client` of them from one client.
+    A request which finds the queue full is rejected at once with 429,
+    one which has waited too long with 503.
+
+    Free slots go to waiters in weighted fair order (start-time fair queuing):
+    a request is tagged with the virtual time its client would reach
+    after one more request, advancing by 1/weight per request, and the
+    lowest tag goes first. Under contention a client with weight 2 gets
+    twice the slots of a client with weight 1, whatever the number of
+    requests each has queued; FIFO order is kept within a client.
+
+    `Retry-After` is estimated from the queue length and
+    the average time a request holds a slot.
+    """
+
+    def __init__(
+        self,
+        max_inflight: int,
+        max_queue: int,
+        queue_timeout: float,
+        max_queue_per_client: Optional[int] = None,
+    ):
+        self.max_inflight = max_inflight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.max_queue_per_client = max_queue_per_client or max_queue
+        self.inflight = 0
+        self.avg_duration = 0.0
+        self._waiters: List[_Waiter] = []
+        self._queued: Dict[str, int] = {}
+        self._last_tags: Dict[str, float] = {}
+        self._virtual_time = 0.0
+        self._seq = itertools.count()
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "inflight": self.inflight,
+            "queued": len(self._waiters),
+            "queued_clients": len(self._queued),
+            "avg_duration": round(self.avg_duration, 4),
+        }
+
+    def get_retry_after(self) -> int:
+        backlog = (len(self._waiters) + 1) / self.max_inflight
+        return max(1, math.ceil(backlog * self.avg_duration))
+
+    @asynccontextmanager
+    async def admit(self, client: str = "", weight: float = 1.0) -> AsyncIterator[None]:
+        await self._acquire(client, weight)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            duration = time.monotonic() - started
+            self.avg_duration += (duration - self.avg_duration) * 0.1
+            self._release()
+
+    async def _acquire(self, client: str, weight: float) -> None:
+        if self.inflight < self.max_inflight and not self._waiters:
+            self.inflight += 1
+            return
+
+        if len(self._waiters) >= self.max_queue:
+            ADMISSION_REJECTED.inc("queue_full")
+            raise Rejected(429, "too many requests", self.get_retry_after())
+
+        if self._queued.get(client, 0) >= self.max_queue_per_client:
+            ADMISSION_REJECTED.inc("client_queue_full")
+            raise Rejected(429, "too many requests", self.get_retry_after())
+
+        waiter = self._enqueue(client, weight)
+        try:
+            # a released slot is handed over to the waiter with its result
+            await asyncio.wait_for(waiter.future, self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._forget(waiter)
+            ADMISSION_REJECTED.inc("queue_timeout")
+            raise Rejected(503, "server is overloaded", self.get_retry_after())
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                self._release()
+            else:
+                self._forget(waiter)
+            raise
+
+    def _enqueue(self, client: str, weight: float) -> _Waiter:
+        start = max(self._virtual_time, self._last_tags.get(client, 0.0))
+        tag = start + 1 / max(weight, 1e-6)
+        self._last_tags[client] = tag
+        self._queued[client] = self._queued.get(client, 0) + 1
+
+        waiter = _Waiter(
+            tag=tag,
+            seq=next(self._seq),
+            client=client,
+            future=asyncio.get_running_loop().create_future(),
+        )
+        heapq.heappush(self._waiters, waiter)
+        return waiter
+
+    def _release(self) -> None:
+        while self._waiters:
+            waiter = heapq.heappop(self._waiters)
+            self._dequeued(waiter)
+            if not waiter.future.done():
+                self._virtual_time = waiter.tag
+                waiter.future.set_result(None)
+                return
+
+        self.inflight -= 1
+
+    def _forget(self, waiter: _Waiter) -> None:
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            return
+        heapq.heapify(self._waiters)
+        self._dequeued(waiter)
+
+    def _dequeued(self, waiter: _Waiter) -> None:
+        left = self._queued[waiter.client] - 1
+        if left:
+            self._queued[waiter.client] = left
+            return
+
+        # an idle client starts again from the virtual time
+        del self._queued[waiter.client]
+        self._last_tags.pop(waiter.client, None)
+
+
+_controller: Optional[AdmissionController] = None
+
+
+def get_admission() -> Optional[AdmissionController]:
+    """
+    Returns the admission controller of this process,
+    or None if ADMISSION_MAX_INFLIGHT is 0 (no limit).
+    """
+
+    global _controller
+
+    settings = get_settings()
+    if _controller is None and settings.ADMISSION_MAX_INFLIGHT > 0:
+        _controller = AdmissionController(
+            max_inflight=settings.ADMISSION_MAX_INFLIGHT,
+            max_queue=settings.ADMISSION_MAX_QUEUE,
+            queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT,
+            max_queue_per_client=settings.ADMISSION_MAX_QUEUE_PER_CLIENT,
+        )
+
+    return _controller
+
+
+@asynccontextmanager
+async def admitted(client: str = "") -> AsyncIterator[None]:
+    """
+    Admits the enclosed request of the client
+    with the controller of this process, if any.
+    Weights of clients are configured with ADMISSION_CLIENT_WEIGHTS.
+    """
+
+    controller = get_admission()
+    if controller is None:
+        yield
+        return
+
+    weight = get_settings().client_weights.get(client, 1.0)
+    async with controller.admit(client, weight):
+        yield
+
+
+def _get_admission_stats():
+    if _controller is None:
+        return {}
+    return {(_name,): _value for _name, _value in _controller.stats().items()}
+
+
+REGISTRY.gauge(
+    "admission",
+    "Requests in flight and waiting for admission.",
+    _get_admission_stats,
+    labels=("stat",),
+)
@@ -0,0 +1,198 @@
+import time
+from collections import deque
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Deque
+from typing import Dict
+from typing import Iterator
+from typing import Optional
+
+import httpx
+
+from framework.utils.config import get_settings
+from framework.utils.http import get_origin
+from framework.utils.metrics import REGISTRY
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of calling a host which is known to be down.
+    """
+
+
+@dataclass
+class HostHealth:
+    state: str = CLOSED
+    failures: int = 0
+    opened_at: float = 0.0
+    latencies: Dict[str, Deque[float]] = field(default_factory=dict)
+
+
+class HealthTracker:
+    """
+    Tracks health of target hosts: a circuit breaker and adaptive timeouts.
+
+    After `failure_threshold` connect errors or timeouts in a row the circuit
+    of the host opens: calls fail at once with CircuitOpenError.
+    `reset_timeout` seconds later one call is let through as a probe
+    (half-open): if it gets a response the circuit closes, otherwise it opens again.
+    Any response counts as a success: the host is up, even if it is broken.
+
+    Timeouts of a step are `factor` times the `quantile` of its last `window`
+    durations, within [min_timeout, max_timeout]; until `min_samples` durations
+    are known, and after a timeout, `default_timeout` is used.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int,
+        reset_timeout: float,
+        default_timeout: float,
+        min_timeout: float,
+        max_timeout: float,
+        factor: float,
+        quantile: float,
+        window: int,
+        min_samples: int,
+        max_hosts: int,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.default_timeout = default_timeout
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.factor = factor
+        self.quantile = quantile
+        self.window = window
+        self.min_samples = min_samples
+        self.max_hosts = max_hosts
+        self._hosts: "OrderedDict[str, HostHealth]" = OrderedDict()
+
+    def states(self) -> Dict[str, int]:
+        counts = {CLOSED: 0, OPEN: 0, HALF_OPEN: 0}
+        for health in self._hosts.values():
+            counts[health.state] += 1
+        return counts
+
+    def get(self, origin: str) -> HostHealth:
+        health = self._hosts.get(origin)
+        if health is None:
+            health = self._hosts[origin] = HostHealth()
+            while len(self._hosts) > self.max_hosts:
+                self._hosts.popitem(last=False)
+        self._hosts.move_to_end(origin)
+        return health
+
+    @contextmanager
+    def call(self, url: str, step: str) -> Iterator[float]:
+        """
+        Guards a call to the url, giving the timeout to use for it.
+
+            with tracker.call(url, "list") as timeout:
+                await client.get(url, timeout=timeout)
+        """
+
+        health = self.get(get_origin(url))
+        self._allow(health)
+
+        started = time.monotonic()
+        try:
+            yield self.get_timeout(health, step)
+        except httpx.TimeoutException:
+            health.latencies.pop(step, None)
+            self._on_failure(health)
+            raise
+        except httpx.NetworkError:
+            self._on_failure(health)
+            raise
+        except BaseException:
+            if health.state == HALF_OPEN:
+                # the probe has not told anything: let another one through
+                health.state = OPEN
+            raise
+        else:
+            self._on_success(health, step, time.monotonic() - started)
+
+    def get_timeout(self, health: HostHealth, step: str) -> float:
+        latencies = health.latencies.get(step)
+        if not latencies or len(latencies) < self.min_samples:
+            return self.default_timeout
+
+        ordered = sorted(latencies)
+        index = min(len(ordered) - 1, int(self.quantile * len(ordered)))
+        timeout = ordered[index] * self.factor
+        return min(max(timeout, self.min_timeout), self.max_timeout)
+
+    def _allow(self, health: HostHealth) -> None:
+        if health.state == CLOSED:
+            return
+
+        if health.state == OPEN:
+            if time.monotonic() - health.opened_at >= self.reset_timeout:
+                health.state = HALF_OPEN
+                return
+
+        raise CircuitOpenError("the host is down, calls are suspended")
+
+    def _on_success(self, health: HostHealth, step: str, duration: float) -> None:
+        health.state = CLOSED
+        health.failures = 0
+
+        latencies = health.latencies.get(step)
+        if latencies is None:
+            latencies = health.latencies[step] = deque(maxlen=self.window)
+        latencies.append(duration)
+
+    def _on_failure(self, health: HostHealth) -> None:
+        health.failures += 1
+        if health.state == HALF_OPEN or health.failures >= self.failure_threshold:
+            health.state = OPEN
+            health.opened_at = time.monotonic()
+
+
+_tracker: Optional[HealthTracker] = None
+
+
+def get_health_tracker() -> HealthTracker:
+    """
+    Returns the health tracker of target hosts of this process.
+    """
+
+    global _tracker
+
+    if _tracker is None:
+        settings = get_settings()
+        _tracker = HealthTracker(
+            failure_threshold=settings.CIRCUIT_FAILURE_THRESHOLD,
+            reset_timeout=settings.CIRCUIT_RESET_TIMEOUT,
+            default_timeout=settings.API_TIMEOUT,
+            min_timeout=settings.ADAPTIVE_TIMEOUT_MIN,
+            max_timeout=settings.ADAPTIVE_TIMEOUT_MAX,
+            factor=settings.ADAPTIVE_TIMEOUT_FACTOR,
+            quantile=settings.ADAPTIVE_TIMEOUT_QUANTILE,
+            window=settings.ADAPTIVE_TIMEOUT_WINDOW,
+            min_samples=settings.ADAPTIVE_TIMEOUT_MIN_SAMPLES,
+            max_hosts=settings.CIRCUIT_MAX_HOSTS,
+        )
+
+    return _tracker
+
+
+def _get_circuit_states():
+    if _tracker is None:
+        return {}
+    return {(_state,): _count for _state, _count in _tracker.states().items()}
+
+
+REGISTRY.gauge(
+    "circuit_breaker_hosts",
+    "Target hosts by circuit breaker state.",
+    _get_circuit_states,
+    labels=("state",),
+)
@@ -0,0 +1,112 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
+from typing import Hashable
+from typing import Tuple
+
+
+class ResultCache:
+    """
+    An in-memory TTL + LRU cache for results of coroutines.
+
+    Concurrent calls for the same key share one in-flight computation
+    (single-flight), even when the result is not going to be cached.
+    The computation runs as a separate task, so it survives cancellation
+    of the caller which started it.
+    """
+
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "size": len(self._entries),
+            "inflight": len(self._inflight),
+        }
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    async def get_or_compute(
+        self,
+        key: Hashable,
+        compute: Callable[[], Awaitable[Any]],
+        fresh: bool = False,
+        cacheable: Callable[[Any], bool] = lambda _value: True,
+    ) -> Any:
+        """
+        Returns a cached result for the key or computes a new one.
+
+        :param key: cache key
+        :param compute: a coroutine function producing the result
+        :param fresh: ignore a stored result, still joining an in-flight computation
+        :param cacheable: a predicate telling whether a result may be stored
+        :return: the result
+        """
+
+        if not fresh:
+            found, value = self._lookup(key)
+            if found:
+                self.hits += 1
+                return value
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            return await asyncio.shield(inflight)
+
+        self.misses += 1
+        task = asyncio.ensure_future(compute())
+        self._inflight[key] = task
+        task.add_done_callback(lambda _t: self._on_done(key, _t, cacheable))
+
+        return await asyncio.shield(task)
+
+    def _lookup(self, key: Hashable) -> Tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return False, None
+
+        self._entries.move_to_end(key)
+        return True, value
+
+    def _on_done(
+        self,
+        key: Hashable,
+        task: asyncio.Future,
+        cacheable: Callable[[Any], bool],
+    ) -> None:
+        self._inflight.pop(key, None)
+
+        if task.cancelled() or task.exception() is not None:
+            return
+
+        value = task.result()
+        if not cacheable(value):
+            return
+
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
@@ -0,0 +1,297 @@
+import asyncio
+import dataclasses
+import gzip
+import json
+import time
+import uuid
+from collections import defaultdict
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from dataclasses import field
+from pathlib import Path
+from typing import Any
+from typing import AsyncIterator
+from typing import Deque
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+from framework.utils.config import get_settings
+
+FORMAT = "cassette/1"
+
+# the body is kept decoded, so these no longer describe it
+_DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+_recording: ContextVar[Optional["Cassette"]] = ContextVar("cassette", default=None)
+
+
+@dataclass
+class Exchange:
+    """
+    A request to the target API and its response.
+    `ttfb` is the time to response headers, `duration` includes the body.
+    """
+
+    method: str
+    url: str
+    request: bytes
+    status: int
+    headers: List[Tuple[str, str]]
+    body: bytes
+    ttfb: float
+    duration: float
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "method": self.method,
+            "url": self.url,
+            "status": self.status,
+            "headers": self.headers,
+            "ttfb": round(self.ttfb, 6),
+            "duration": round(self.duration, 6),
+            **_encode("request", self.request),
+            **_encode("body", self.body),
+        }
+
+    @classmethod
+    def from_json(cls, obj: Dict[str, Any]) -> "Exchange":
+        return cls(
+            method=obj["method"],
+            url=obj["url"],
+            request=_decode("request", obj),
+            status=obj["status"],
+            headers=[tuple(_pair) for _pair in obj["headers"]],
+            body=_decode("body", obj),
+            ttfb=obj["ttfb"],
+            duration=obj["duration"],
+        )
+
+
+def _encode(key: str, data: bytes) -> Dict[str, str]:
+    # JSON bodies are kept as text: readable, and small once gzipped
+    try:
+        return {key: data.decode()}
+    except UnicodeDecodeError:
+        return {f"{key}_hex": data.hex()}
+
+
+def _decode(key: str, obj: Dict[str, Any]) -> bytes:
+    if f"{key}_hex" in obj:
+        return bytes.fromhex(obj[f"{key}_hex"])
+    return obj.get(key, "").encode()
+
+
+@dataclass
+class Cassette:
+    """
+    HTTP exchanges of one validation of a target, in order.
+
+    On disk a cassette is a gzipped JSON Lines file: a header line
+    with the target, then a line per exchange.
+    """
+
+    target: str
+    exchanges: List[Exchange] = field(default_factory=list)
+    recorded_at: float = field(default_factory=time.time)
+
+    def save(self, path: Path) -> None:
+        with gzip.open(path, "wt", encoding="utf-8") as stream:
+            header = {
+                "format": FORMAT,
+                "target": self.target,
+                "recorded_at": self.recorded_at,
+            }
+            stream.write(json.dumps(header) + "\n")
+            for exchange in self.exchanges:
+                stream.write(json.dumps(exchange.to_json(), ensure_ascii=False))
+                stream.write("\n")
+
+    def save_to_dir(self, directory: str) -> Path:
+        host = urlsplit(self.target).hostname or "target"
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.gmtime(self.recorded_at))
+        path = Path(directory) / f"{host}-{stamp}-{uuid.uuid4().hex[:8]}.jsonl.gz"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.save(path)
+        return path
+
+    @classmethod
+    def load(cls, path: Path) -> "Cassette":
+        with gzip.open(path, "rt", encoding="utf-8") as stream:
+            header = json.loads(stream.readline())
+            if header.get("format") != FORMAT:
+                raise ValueError(f"{path} is not a {FORMAT} file")
+            exchanges = [Exchange.from_json(json.loads(_line)) for _line in stream]
+
+        return cls(
+            target=header["target"],
+            exchanges=exchanges,
+            recorded_at=header["recorded_at"],
+        )
+
+
+@contextmanager
+def recording(target: str) -> Iterator[Optional[Cassette]]:
+    """
+    Records exchanges made through a CassetteRecorder in this context,
+    including tasks started from it, if CASSETTE_RECORD_DIR is set;
+    otherwise gives None.
+    """
+
+    if not get_settings().CASSETTE_RECORD_DIR:
+        yield None
+        return
+
+    cassette = Cassette(target=target)
+    token = _recording.set(cassette)
+    try:
+        yield cassette
+    finally:
+        _recording.reset(token)
+
+
+async def save_cassette(cassette: Cassette) -> Path:
+    directory = get_settings().CASSETTE_RECORD_DIR
+    return await asyncio.to_thread(cassette.save_to_dir, directory)
+
+
+class CassetteRecorder(httpx.AsyncBaseTransport):
+    """
+    Sends requests with the `inner` transport, and adds exchanges
+    to the cassette being recorded, if any.
+
+    A recorded response is read whole before it is given to the caller,
+    so streaming consumers get the body only once it is received.
+    """
+
+    def __init__(self, inner: Optional[httpx.AsyncBaseTransport] = None):
+        self.inner = inner or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        cassette = _recording.get()
+        if cassette is None:
+            return await self.inner.handle_async_request(request)
+
+        started = time.perf_counter()
+        response = await self.inner.handle_async_request(request)
+        ttfb = time.perf_counter() - started
+        body = await response.aread()
+
+        exchange = Exchange(
+            method=request.method,
+            url=str(request.url),
+            request=request.content,
+            status=response.status_code,
+            headers=_keep_headers(response.headers.multi_items()),
+            body=body,
+            ttfb=ttfb,
+            duration=time.perf_counter() - started,
+        )
+        cassette.exchanges.append(exchange)
+
+        return _build_response(exchange, httpx.ByteStream(body))
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+
+def _keep_headers(headers: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+    return [(_k, _v) for _k, _v in headers if _k.lower() not in _DROPPED_HEADERS]
+
+
+def _build_response(exchange: Exchange, stream: Any) -> httpx.Response:
+    headers = exchange.headers + [("content-length", str(len(exchange.body)))]
+    return httpx.Response(exchange.status, headers=headers, stream=stream)
+
+
+class CassettePlayer(httpx.AsyncBaseTransport):
+    """
+    Serves responses from a cassette instead of the network.
+
+    A request gets the next recorded response for its method and URL;
+    with none left it fails with ConnectError. With `speed` > 0 responses
+    keep their recorded timing, sped up `speed` times; with 0 they come at once.
+
+    Values generated by the scenario (like contents of new posts) differ
+    between runs: strings which differ between a recorded and a replayed
+    JSON request body are substituted in all later responses.
+    """
+
+    def __init__(self, cassette: Cassette, speed: float = 0.0):
+        self.cassette = cassette
+        self.speed = speed
+        self._queues: Dict[Tuple[str, str], Deque[Exchange]] = defaultdict(deque)
+        self._substitutions: Dict[bytes, bytes] = {}
+        for exchange in cassette.exchanges:
+            self._queues[(exchange.method, exchange.url)].append(exchange)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        queue = self._queues.get((request.method, str(request.url)))
+        if not queue:
+            raise httpx.ConnectError(
+                f"no recorded response for {request.method} {request.url}",
+                request=request,
+            )
+
+        exchange = queue.popleft()
+        self._learn(exchange.request, request.content)
+
+        body = exchange.body
+        for old, new in self._substitutions.items():
+            body = body.replace(old, new)
+        replayed = dataclasses.replace(exchange, body=body)
+
+        if not self.speed:
+            return _build_response(replayed, httpx.ByteStream(body))
+
+        await asyncio.sleep(exchange.ttfb / self.speed)
+        transfer = max(0.0, exchange.duration - exchange.ttfb) / self.speed
+        return _build_response(replayed, _PacedStream(body, transfer))
+
+    def _learn(self, recorded: bytes, replayed: bytes) -> None:
+        if recorded == replayed or not recorded:
+            return
+
+        try:
+            old, new = json.loads(recorded), json.loads(replayed)
+        except ValueError:
+            return
+
+        for old_value, new_value in _diff_strings(old, new):
+            self._substitutions[old_value.encode()] = new_value.encode()
+
+
+def _diff_strings(old: Any, new: Any) -> Iterator[Tuple[str, str]]:
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key in old.keys() & new.keys():
+            yield from _diff_strings(old[key], new[key])
+    elif isinstance(old, list) and isinstance(new, list):
+        for old_item, new_item in zip(old, new):
+            yield from _diff_strings(old_item, new_item)
+    elif isinstance(old, str) and isinstance(new, str) and old != new:
+        yield old, new
+
+
+class _PacedStream(httpx.AsyncByteStream):
+    """
+    Gives the body in chunks spread evenly over `duration` seconds.
+    """
+
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, body: bytes, duration: float):
+        self.body = body
+        self.duration = duration
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        chunks = max(1, -(-len(self.body) // self.CHUNK_SIZE))
+        for start in range(0, len(self.body) or 1, self.CHUNK_SIZE):
+            await asyncio.sleep(self.duration / chunks)
+            yield self.body[start : start + self.CHUNK_SIZE]
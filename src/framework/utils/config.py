@@ -0,0 +1,246 @@
+import dataclasses
+import threading
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from urllib.parse import urlsplit
+
+from framework.utils.settings import as_bool
+from framework.utils.settings import get_raw_setting
+from framework.utils.settings import reload_dynaconf_settings
+
+Subscriber = Callable[["Settings", "Settings"], None]
+
+_CONVERTERS = {
+    bool: as_bool,
+    float: float,
+    int: int,
+    str: str,
+}
+
+
+@dataclass(frozen=True)
+class DatabaseUrl:
+    host: Optional[str]
+    port: int
+    name: str
+    username: Optional[str]
+    password: Optional[str]
+
+    @classmethod
+    def parse(cls, url: str) -> "DatabaseUrl":
+        parts = urlsplit(url)
+        return cls(
+            host=parts.hostname,
+            port=int(parts.port or 5432),
+            name=parts.path.replace("/", ""),
+            username=parts.username,
+            password=parts.password,
+        )
+
+
+def parse_pairs(value: str) -> Dict[str, float]:
+    """
+    Parses "name=number" pairs separated with commas; malformed pairs are skipped.
+    """
+
+    pairs = {}
+    for pair in value.split(","):
+        name, sep, number = pair.strip().rpartition("=")
+        if sep:
+            pairs[name.strip()] = float(number)
+    return pairs
+
+
+@dataclass(frozen=True)
+class Settings:
+    """
+    An immutable snapshot of the settings the application reads at runtime.
+
+    Values are loaded once from ENV and Dynaconf (see `get_setting`)
+    and converted to the annotated types; a field keeps its default
+    if the setting is not set or empty. The defaults are declared here only:
+    settings files override them per environment.
+    """
+
+    ADAPTIVE_TIMEOUT_FACTOR: float = 3.0
+    ADAPTIVE_TIMEOUT_MAX: float = 5.0
+    ADAPTIVE_TIMEOUT_MIN: float = 0.5
+    ADAPTIVE_TIMEOUT_MIN_SAMPLES: int = 10
+    ADAPTIVE_TIMEOUT_QUANTILE: float = 0.99
+    ADAPTIVE_TIMEOUT_WINDOW: int = 50
+    ADMIN_TOKEN: str = ""
+    ADMISSION_CLIENT_WEIGHTS: str = ""
+    ADMISSION_MAX_INFLIGHT: int = 20
+    ADMISSION_MAX_QUEUE: int = 50
+    ADMISSION_MAX_QUEUE_PER_CLIENT: int = 10
+    ADMISSION_QUEUE_TIMEOUT: float = 5.0
+    API_CLEANUP_POSTS: bool = False
+    API_MAX_PAGES: int = 20
+    API_PAGE_SIZE: int = 0
+    API_PAGE_SORT: str = ""
+    API_STREAM_POSTS: bool = True
+    API_TIMEOUT: float = 2.0
+    BATCH_CONCURRENCY: int = 10
+    BATCH_MAX_URLS: int = 100
+    CASSETTE_RECORD_DIR: str = ""
+    DATABASE_URL: str = ""
+    CIRCUIT_FAILURE_THRESHOLD: int = 3
+    CIRCUIT_MAX_HOSTS: int = 1024
+    CIRCUIT_RESET_TIMEOUT: float = 30.0
+    DB_POOL_SIZE: int = 5
+    DB_POOL_TIMEOUT: float = 10.0
+    HISTORY_BATCH_SIZE: int = 100
+    HISTORY_ENABLED: bool = True
+    HISTORY_FLUSH_INTERVAL: float = 1.0
+    HISTORY_MAX_BUFFER: int = 10000
+    HISTORY_RETENTION: float = 604800.0
+    HISTORY_SQLITE_PATH: str = ""
+    HTTP_POOL_IDLE_TIMEOUT: float = 300.0
+    HTTP_POOL_KEEPALIVE_EXPIRY: float = 30.0
+    HTTP_POOL_MAX_CONNECTIONS: int = 10
+    HTTP_POOL_MAX_HOSTS: int = 64
+    JOBS_LEASE: float = 60.0
+    JOBS_MAX_ATTEMPTS: int = 3
+    JOBS_MAX_WAIT: float = 30.0
+    JOBS_POLL_INTERVAL: float = 0.5
+    JOBS_SQLITE_PATH: str = ""
+    JOBS_WORKERS: int = 4
+    LOADTEST_COOLDOWN: float = 300.0
+    LOADTEST_MAX_DURATION: float = 25.0
+    LOADTEST_MAX_REQUESTS: int = 2000
+    LOADTEST_MAX_RUNNING: int = 1
+    LOADTEST_MAX_USERS: int = 20
+    LOADTEST_SQLITE_PATH: str = ""
+    LOG_FORMAT: str = "text"
+    LOG_QUEUE_SIZE: int = 10000
+    LOG_RATE_LIMITS: str = ""
+    LOG_SAMPLING: str = ""
+    MODE_DEBUG: bool = True
+    MODE_PROFILING: bool = False
+    PAGES_MAX_AGE: int = 600
+    PROFILING_INTERVAL: float = 0.005
+    PROFILING_MAX_STACKS: int = 10000
+    PROFILING_SAMPLE_RATE: float = 0.1
+    RESULT_CACHE_SIZE: int = 1024
+    RESULT_CACHE_TTL: float = 15.0
+    SENTRY_DSN: str = ""
+    TRACES_MAX_PER_SECOND: float = 10.0
+    TRACES_ROUTE_RATES: str = ""
+    TRACES_SAMPLE_RATE: float = 0.1
+    TRACES_SLOW_THRESHOLD: float = 1.0
+    TRUSTED_PROXY_HOPS: int = 0
+
+    @cached_property
+    def database(self) -> Optional[DatabaseUrl]:
+        if not self.DATABASE_URL:
+            return None
+        return DatabaseUrl.parse(self.DATABASE_URL)
+
+    @cached_property
+    def client_weights(self) -> Dict[str, float]:
+        """
+        Parses ADMISSION_CLIENT_WEIGHTS: "client=weight" pairs separated with commas.
+        """
+
+        return parse_pairs(self.ADMISSION_CLIENT_WEIGHTS)
+
+    @cached_property
+    def log_sampling(self) -> Dict[str, float]:
+        """
+        Parses LOG_SAMPLING: "logger=rate" pairs, rates in [0, 1].
+        """
+
+        return parse_pairs(self.LOG_SAMPLING)
+
+    @cached_property
+    def log_rate_limits(self) -> Dict[str, float]:
+        """
+        Parses LOG_RATE_LIMITS: "logger=records per second" pairs.
+        """
+
+        return parse_pairs(self.LOG_RATE_LIMITS)
+
+    @cached_property
+    def traces_route_rates(self) -> Dict[str, float]:
+        """
+        Parses TRACES_ROUTE_RATES: "route=rate" pairs,
+        routes being transaction names or URL paths.
+        """
+
+        return parse_pairs(self.TRACES_ROUTE_RATES)
+
+    def changed(self, other: "Settings") -> List[str]:
+        """
+        Returns names of settings which differ in the other snapshot.
+        """
+
+        return [
+            _field.name
+            for _field in dataclasses.fields(self)
+            if getattr(self, _field.name) != getattr(other, _field.name)
+        ]
+
+
+def load_settings() -> Settings:
+    values = {}
+    for field in dataclasses.fields(Settings):
+        value: Any = get_raw_setting(field.name)
+        if value is None or value == "":
+            continue
+        values[field.name] = _CONVERTERS[field.type](value)
+
+    return Settings(**values)
+
+
+_settings: Optional[Settings] = None
+_subscribers: List[Subscriber] = []
+_lock = threading.Lock()
+
+
+def get_settings() -> Settings:
+    """
+    Returns the current settings snapshot, loading it on the first call.
+    """
+
+    return _settings or reload_settings()
+
+
+def reload_settings() -> Settings:
+    """
+    Loads a new settings snapshot.
+    If any value has changed, subscribers are called with the old and the new snapshots.
+    """
+
+    global _settings
+
+    with _lock:
+        if _settings is not None:
+            reload_dynaconf_settings()
+        old, new = _settings, load_settings()
+        _settings = new
+
+    if old is not None and old.changed(new):
+        for callback in list(_subscribers):
+            callback(old, new)
+
+    return new
+
+
+def subscribe(callback: Subscriber) -> Callable[[], None]:
+    """
+    Registers a callback for settings changes.
+    Returns a function which unsubscribes it.
+    """
+
+    _subscribers.append(callback)
+
+    def unsubscribe() -> None:
+        if callback in _subscribers:
+            _subscribers.remove(callback)
+
+    return unsubscribe
@@ -1,42 +1,61 @@
-from urllib.parse import urlsplit
+from typing import Optional
 
-from framework.utils.settings import get_setting
+from framework.utils.config import get_settings
+from framework.utils.dbpool import ConnectionPool
+
+NO_DATABASE = "--- no database configured ---"
+
+_pool: Optional[ConnectionPool] = None
+
+
+def get_db_pool() -> Optional[ConnectionPool]:
+    """
+    Returns the pool of connections to DATABASE_URL of this process,
+    or None if no database is configured.
+    """
+
+    global _pool
+
+    settings = get_settings()
+    if _pool is None and settings.database:
+        import psycopg2
+
+        _pool = ConnectionPool(
+            lambda: psycopg2.connect(settings.DATABASE_URL),
+            max_size=settings.DB_POOL_SIZE,
+            timeout=settings.DB_POOL_TIMEOUT,
+        )
+
+    return _pool
 
 
 def get_db_host():
-    url = get_setting("DATABASE_URL")
-    if not url:
-        return "--- no database configured ---"
+    database = get_settings().database
+    if not database:
+        return NO_DATABASE
 
-    url = urlsplit(url)
-    host = url.hostname
-    return host
+    return database.host
 
 
 def get_db_port():
-    url = get_setting("DATABASE_URL")
-    if not url:
-        return "--- no database configured ---"
+    database = get_settings().database
+    if not database:
+        return NO_DATABASE
 
-    url = urlsplit(url)
-    port = int(url.port or 5432)
-    return port
+    return database.port
 
 
 def get_db_name():
-    url = get_setting("DATABASE_URL")
-    if not url:
-        return "--- no database configured ---"
+    database = get_settings().database
+    if not database:
+        return NO_DATABASE
 
-    url = urlsplit(url)
-    name = url.path.replace("/", "")
-    return name
+    return database.name
 
 
 def get_db_username():
-    url = get_setting("DATABASE_URL")
-    if not url:
-        return "--- no database configured ---"
+    database = get_settings().database
+    if not database:
+        return NO_DATABASE
 
-    url = urlsplit(url)
-    return url.username
+    return database.username
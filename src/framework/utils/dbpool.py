@@ -0,0 +1,98 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Iterator
+from typing import List
+
+
+class ConnectionPool:
+    """
+    A bounded pool of DB-API connections, safe to share between threads.
+
+    At most `max_size` connections are open at a time: callers wait
+    up to `timeout` seconds for a free one and get TimeoutError after that.
+    A connection is committed when the `with` block succeeds, rolled back
+    when it fails, and dropped if even the rollback fails (it is broken).
+    """
+
+    def __init__(self, connect: Callable[[], Any], max_size: int, timeout: float = 10):
+        self.connect = connect
+        self.max_size = max_size
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._idle: List[Any] = []
+        self._open = 0
+        self._lock = threading.Lock()
+
+    def stats(self) -> Dict[str, int]:
+        return {"open": self._open, "idle": len(self._idle)}
+
+    @contextmanager
+    def connection(self) -> Iterator[Any]:
+        if not self._slots.acquire(timeout=self.timeout):
+            raise TimeoutError(f"no free DB connection in {self.timeout} seconds")
+
+        try:
+            connection = self._take()
+            try:
+                yield connection
+            except BaseException:
+                self._rollback(connection)
+                raise
+            else:
+                connection.commit()
+                self._give_back(connection)
+        finally:
+            self._slots.release()
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+        for connection in idle:
+            connection.close()
+
+    def _take(self) -> Any:
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+            self._open += 1
+
+        try:
+            return self.connect()
+        except BaseException:
+            with self._lock:
+                self._open -= 1
+            raise
+
+    def _give_back(self, connection: Any) -> None:
+        with self._lock:
+            self._idle.append(connection)
+
+    def _rollback(self, connection: Any) -> None:
+        try:
+            connection.rollback()
+        except Exception:
+            with self._lock:
+                self._open -= 1
+            try:
+                connection.close()
+            except Exception:
+                pass
+        else:
+            self._give_back(connection)
+
+
+def create_sqlite_pool(path: str) -> ConnectionPool:
+    def connect():
+        connection = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            # a file is shared by processes: readers should not wait for writers
+            connection.execute("PRAGMA journal_mode=WAL")
+        return connection
+
+    # an in-memory database exists per connection: all callers share one
+    return ConnectionPool(connect, max_size=1)
@@ -0,0 +1,156 @@
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Generic
+from typing import Optional
+from typing import Type
+from typing import TypeVar
+
+from pydantic import BaseModel
+from pydantic.fields import ModelField
+from pydantic.fields import SHAPE_LIST
+from pydantic.fields import SHAPE_MAPPING
+from pydantic.fields import SHAPE_SINGLETON
+
+Check = Callable[[Any], bool]
+Build = Callable[[Any], Any]
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+_EXACT_TYPES = {bool, float, int, str}
+
+
+def _reject(_value: Any) -> bool:
+    return False
+
+
+def _keep(value: Any) -> Any:
+    return value
+
+
+class CompiledModel(Generic[ModelT]):
+    """
+    A precompiled, strict checker for a pydantic model.
+
+    `parse` checks a decoded JSON payload with plain type checks and,
+    if it passes, builds the model with `construct` (no validation).
+    Anything the checker is not sure about (coercions, unknown types,
+    missing fields) goes through `parse_obj`, so results and error
+    messages are the same as with pydantic.
+    """
+
+    def __init__(self, model: Type[ModelT]):
+        self.model = model
+        self.check, self.build = _compile_model(model)
+
+    def parse(self, payload: Any) -> ModelT:
+        if self.check(payload):
+            return self.build(payload)
+
+        return self.model.parse_obj(payload)
+
+
+def _compile_model(model: Type[BaseModel]):
+    fields = []
+    for field in model.__fields__.values():
+        check, build = _compile_field(field)
+        fields.append((field.name, field.alias, field.required, check, build))
+
+    def check_model(value: Any) -> bool:
+        if type(value) is not dict:
+            return False
+
+        for _name, alias, required, check, _build in fields:
+            if alias in value:
+                if not check(value[alias]):
+                    return False
+            elif required:
+                return False
+
+        return True
+
+    def build_model(value: Dict) -> BaseModel:
+        values = {
+            name: build(value[alias])
+            for name, alias, _required, _check, build in fields
+            if alias in value
+        }
+        return model.construct(**values)
+
+    return check_model, build_model
+
+
+def _compile_field(field: ModelField):
+    check, build = _compile_type(field.type_)
+
+    if field.shape == SHAPE_LIST:
+        check, build = _compile_list(check, build)
+    elif field.shape == SHAPE_MAPPING:
+        # the value field knows if values may be None, unlike field.type_
+        if field.sub_fields:
+            check, build = _compile_field(field.sub_fields[0])
+        check, build = _compile_mapping(_compile_field(field.key_field), check, build)
+    elif field.shape != SHAPE_SINGLETON:
+        check = _reject
+
+    if field.allow_none:
+        check = _allow_none(check)
+        build = _allow_none_build(build)
+
+    return check, build
+
+
+def _compile_type(type_: Any):
+    if type_ in _EXACT_TYPES:
+        return (lambda _value: type(_value) is type_), _keep
+
+    if type_ is Any:
+        return (lambda _value: True), _keep
+
+    if type_ in (dict, Dict):
+        return (lambda _value: type(_value) is dict), _keep
+
+    if isinstance(type_, type) and issubclass(type_, BaseModel):
+        return _compile_model(type_)
+
+    return _reject, _keep
+
+
+def _compile_list(check: Check, build: Build):
+    def check_list(value: Any) -> bool:
+        return type(value) is list and all(check(_item) for _item in value)
+
+    def build_list(value: list) -> list:
+        if build is _keep:
+            return list(value)
+        return [build(_item) for _item in value]
+
+    return check_list, build_list
+
+
+def _compile_mapping(key, check: Check, build: Build):
+    check_key, build_key = key
+
+    def check_mapping(value: Any) -> bool:
+        return type(value) is dict and all(
+            check_key(_key) and check(_item) for _key, _item in value.items()
+        )
+
+    def build_mapping(value: dict) -> dict:
+        return {build_key(_key): build(_item) for _key, _item in value.items()}
+
+    return check_mapping, build_mapping
+
+
+def _allow_none(check: Check) -> Check:
+    def check_optional(value: Any) -> bool:
+        return value is None or check(value)
+
+    return check_optional
+
+
+def _allow_none_build(build: Build) -> Build:
+    def build_optional(value: Optional[Any]) -> Any:
+        return None if value is None else build(value)
+
+    return build_optional
@@ -0,0 +1,170 @@
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator
+from typing import List
+from typing import Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from framework.utils.cassette import CassetteRecorder
+from framework.utils.config import get_settings
+
+
+def get_origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}".lower()
+
+
+@dataclass
+class _PoolEntry:
+    client: httpx.AsyncClient
+    last_used: float
+    active: int = 0
+
+
+class ClientPool:
+    """
+    Keeps one keep-alive HTTP client per target origin.
+
+    Each client holds at most `max_connections` connections to its host,
+    and connections idle for `keepalive_expiry` seconds are dropped by httpx.
+    Whole clients are evicted when unused for `idle_timeout` seconds,
+    or in LRU order when more than `max_hosts` origins are pooled.
+    Clients with requests in flight are never evicted.
+    Limits which are not given are taken from settings.
+
+    With `record` (by default, if CASSETTE_RECORD_DIR is set) exchanges
+    can be recorded into cassettes, see `framework.utils.cassette.recording`.
+    """
+
+    def __init__(
+        self,
+        max_connections: Optional[int] = None,
+        keepalive_expiry: Optional[float] = None,
+        max_hosts: Optional[int] = None,
+        idle_timeout: Optional[float] = None,
+        timeout: Optional[float] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        record: Optional[bool] = None,
+    ):
+        settings = get_settings()
+        if max_connections is None:
+            max_connections = settings.HTTP_POOL_MAX_CONNECTIONS
+        if keepalive_expiry is None:
+            keepalive_expiry = settings.HTTP_POOL_KEEPALIVE_EXPIRY
+
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.max_hosts = (
+            settings.HTTP_POOL_MAX_HOSTS if max_hosts is None else max_hosts
+        )
+        self.idle_timeout = (
+            settings.HTTP_POOL_IDLE_TIMEOUT if idle_timeout is None else idle_timeout
+        )
+        self.timeout = settings.API_TIMEOUT if timeout is None else timeout
+        self.transport = transport
+        self.record = bool(settings.CASSETTE_RECORD_DIR) if record is None else record
+        self._entries: "OrderedDict[str, _PoolEntry]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @asynccontextmanager
+    async def client(self, url: str) -> AsyncIterator[httpx.AsyncClient]:
+        origin = get_origin(url)
+        entry = self._acquire(origin)
+        try:
+            yield entry.client
+        finally:
+            entry.active -= 1
+            entry.last_used = time.monotonic()
+
+        await self._close_all(self._evict())
+
+    async def aclose(self) -> None:
+        entries = list(self._entries.values())
+        self._entries.clear()
+        await self._close_all(entries)
+
+    def _acquire(self, origin: str) -> _PoolEntry:
+        entry = self._entries.get(origin)
+        if entry is None or entry.client.is_closed:
+            transport = self.transport
+            if self.record:
+                transport = CassetteRecorder(
+                    transport or httpx.AsyncHTTPTransport(limits=self.limits)
+                )
+            client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=self.limits,
+                transport=transport,
+            )
+            entry = _PoolEntry(client=client, last_used=time.monotonic())
+            self._entries[origin] = entry
+
+        self._entries.move_to_end(origin)
+        entry.active += 1
+        entry.last_used = time.monotonic()
+        return entry
+
+    def _evict(self) -> List[_PoolEntry]:
+        now = time.monotonic()
+        evicted = []
+
+        for origin, entry in list(self._entries.items()):
+            if entry.active:
+                continue
+
+            expired = now - entry.last_used > self.idle_timeout
+            overflow = len(self._entries) > self.max_hosts
+            if expired or overflow:
+                evicted.append(self._entries.pop(origin))
+
+        return evicted
+
+    @staticmethod
+    async def _close_all(entries: List[_PoolEntry]) -> None:
+        for entry in entries:
+            await entry.client.aclose()
+
+
+_pool: Optional[ClientPool] = None
+
+
+def get_pool() -> ClientPool:
+    """
+    Returns the client pool shared by all validations of this process.
+    The pool is created lazily, so its clients are bound to the running event loop.
+    """
+
+    global _pool
+
+    if _pool is None:
+        _pool = ClientPool()
+
+    return _pool
+
+
+async def close_pool() -> None:
+    global _pool
+
+    if _pool is not None:
+        await _pool.aclose()
+        _pool = None
+
+
+async def use_pool(pool: ClientPool) -> None:
+    """
+    Replaces the shared pool, e.g. with one replaying cassettes.
+    """
+
+    global _pool
+
+    await close_pool()
+    _pool = pool
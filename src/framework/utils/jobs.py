@@ -0,0 +1,279 @@
+import json
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Any
+from typing import Dict
+from typing import Iterator
+from typing import Optional
+from typing import Sequence
+
+from framework.utils.dbpool import ConnectionPool
+from framework.utils.dbpool import create_sqlite_pool
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+FINISHED = {STATUS_DONE, STATUS_FAILED}
+
+_COLUMNS = (
+    "id",
+    "url",
+    "status",
+    "params",
+    "result",
+    "attempts",
+    "created_at",
+    "started_at",
+    "finished_at",
+)
+
+
+@dataclass
+class Job:
+    id: str
+    url: str
+    status: str = STATUS_QUEUED
+    params: Dict[str, Any] = field(default_factory=dict)
+    result: Optional[Dict[str, Any]] = None
+    attempts: int = 0
+    created_at: float = 0.0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED
+
+    @classmethod
+    def from_row(cls, row: Sequence) -> "Job":
+        values = dict(zip(_COLUMNS, row))
+        values["params"] = json.loads(values["params"] or "{}")
+        if values["result"] is not None:
+            values["result"] = json.loads(values["result"])
+        return cls(**values)
+
+
+class JobStore:
+    """
+    A durable queue of validation jobs in an SQL database.
+
+    A worker claims a job by moving it to "running" with a lease:
+    a job whose lease has expired (its worker died) is claimed again,
+    up to `max_attempts` times, after which it is marked "failed".
+
+    Calls are blocking: run them in a thread from async code.
+    """
+
+    placeholder = "%s"
+    ddl = ""
+
+    def __init__(self, pool: ConnectionPool, lease: float, max_attempts: int):
+        self.pool = pool
+        self.lease = lease
+        self.max_attempts = max_attempts
+
+    @contextmanager
+    def _transaction(self) -> Iterator[Any]:
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            try:
+                self._begin(cursor)
+                yield cursor
+            finally:
+                cursor.close()
+
+    def _begin(self, cursor) -> None:
+        pass
+
+    def _claim_next(self, cursor, now: float) -> Optional[Sequence]:
+        raise NotImplementedError
+
+    def _sql(self, query: str) -> str:
+        return query.format(p=self.placeholder, columns=", ".join(_COLUMNS))
+
+    def setup(self) -> None:
+        with self._transaction() as cursor:
+            cursor.execute(self.ddl)
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS validation_jobs_status_idx"
+                " ON validation_jobs (status, created_at)"
+            )
+
+    def submit(self, url: str, params: Optional[Dict[str, Any]] = None) -> Job:
+        job = Job(
+            id=uuid.uuid4().hex,
+            url=url,
+            params=params or {},
+            created_at=time.time(),
+        )
+        with self._transaction() as cursor:
+            cursor.execute(
+                self._sql(
+                    "INSERT INTO validation_jobs (id, url, status, params, created_at)"
+                    " VALUES ({p}, {p}, {p}, {p}, {p})"
+                ),
+                (job.id, job.url, job.status, json.dumps(job.params), job.created_at),
+            )
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._transaction() as cursor:
+            cursor.execute(
+                self._sql("SELECT {columns} FROM validation_jobs WHERE id = {p}"),
+                (job_id,),
+            )
+            row = cursor.fetchone()
+        return Job.from_row(row) if row else None
+
+    def claim(self) -> Optional[Job]:
+        """
+        Takes the oldest available job for this worker, or returns None.
+        """
+
+        now = time.time()
+        with self._transaction() as cursor:
+            cursor.execute(
+                self._sql(
+                    "UPDATE validation_jobs SET status = {p}, finished_at = {p}"
+                    " WHERE status = {p} AND locked_until < {p} AND attempts >= {p}"
+                ),
+                (STATUS_FAILED, now, STATUS_RUNNING, now, self.max_attempts),
+            )
+            row = self._claim_next(cursor, now)
+        return Job.from_row(row) if row else None
+
+    def finish(self, job_id: str, result: Dict[str, Any]) -> None:
+        with self._transaction() as cursor:
+            cursor.execute(
+                self._sql(
+                    "UPDATE validation_jobs"
+                    " SET status = {p}, result = {p}, finished_at = {p}"
+                    " WHERE id = {p} AND status = {p}"
+                ),
+                (STATUS_DONE, json.dumps(result), time.time(), job_id, STATUS_RUNNING),
+            )
+
+    def release(self, job_id: str) -> None:
+        """
+        Returns an unfinished job to the queue, e.g. on shutdown of its worker.
+        """
+
+        with self._transaction() as cursor:
+            cursor.execute(
+                self._sql(
+                    "UPDATE validation_jobs"
+                    " SET status = {p}, attempts = attempts - 1, locked_until = NULL"
+                    " WHERE id = {p} AND status = {p}"
+                ),
+                (STATUS_QUEUED, job_id, STATUS_RUNNING),
+            )
+
+    def _claim_condition(self) -> str:
+        return self._sql(
+            "status = {p} OR (status = {p} AND locked_until < {p} AND attempts < {p})"
+        )
+
+    def _claim_condition_params(self, now: float) -> tuple:
+        return STATUS_QUEUED, STATUS_RUNNING, now, self.max_attempts
+
+    def _claim_update(self) -> str:
+        return self._sql(
+            "UPDATE validation_jobs"
+            " SET status = {p}, attempts = attempts + 1,"
+            " started_at = {p}, locked_until = {p}"
+        )
+
+
+class SqliteJobStore(JobStore):
+    """
+    A job store in an SQLite file, for local runs and tests.
+    The default ":memory:" database lives as long as the store.
+    """
+
+    placeholder = "?"
+    ddl = """
+        CREATE TABLE IF NOT EXISTS validation_jobs (
+            id TEXT PRIMARY KEY,
+            url TEXT NOT NULL,
+            status TEXT NOT NULL,
+            params TEXT,
+            result TEXT,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            created_at REAL NOT NULL,
+            started_at REAL,
+            finished_at REAL,
+            locked_until REAL
+        )
+    """
+
+    def __init__(
+        self, path: str = ":memory:", lease: float = 60, max_attempts: int = 3
+    ):
+        super().__init__(create_sqlite_pool(path), lease, max_attempts)
+
+    def _begin(self, cursor) -> None:
+        # BEGIN IMMEDIATE takes the write lock up front,
+        # so two processes never claim the same job
+        cursor.execute("BEGIN IMMEDIATE")
+
+    def _claim_next(self, cursor, now: float) -> Optional[Sequence]:
+        cursor.execute(
+            "SELECT id FROM validation_jobs"
+            f" WHERE {self._claim_condition()}"
+            " ORDER BY created_at LIMIT 1",
+            self._claim_condition_params(now),
+        )
+        row = cursor.fetchone()
+        if row is None:
+            return None
+
+        cursor.execute(
+            self._claim_update() + " WHERE id = ?",
+            (STATUS_RUNNING, now, now + self.lease, row[0]),
+        )
+        cursor.execute(
+            self._sql("SELECT {columns} FROM validation_jobs WHERE id = ?"), row
+        )
+        return cursor.fetchone()
+
+
+class PostgresJobStore(JobStore):
+    """
+    A job store in PostgreSQL: several nodes can drain one queue,
+    as claims skip rows locked by concurrent claims.
+    """
+
+    ddl = """
+        CREATE TABLE IF NOT EXISTS validation_jobs (
+            id TEXT PRIMARY KEY,
+            url TEXT NOT NULL,
+            status TEXT NOT NULL,
+            params TEXT,
+            result TEXT,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            created_at DOUBLE PRECISION NOT NULL,
+            started_at DOUBLE PRECISION,
+            finished_at DOUBLE PRECISION,
+            locked_until DOUBLE PRECISION
+        )
+    """
+
+    def __init__(self, pool: ConnectionPool, lease: float = 60, max_attempts: int = 3):
+        super().__init__(pool, lease, max_attempts)
+
+    def _claim_next(self, cursor, now: float) -> Optional[Sequence]:
+        cursor.execute(
+            self._claim_update() + " WHERE id = ("
+            " SELECT id FROM validation_jobs"
+            f" WHERE {self._claim_condition()}"
+            " ORDER BY created_at LIMIT 1"
+            " FOR UPDATE SKIP LOCKED"
+            ")" + self._sql(" RETURNING {columns}"),
+            (STATUS_RUNNING, now, now + self.lease) + self._claim_condition_params(now),
+        )
+        return cursor.fetchone()
@@ -0,0 +1,155 @@
+import codecs
+import json
+from typing import Any
+from typing import AsyncIterator
+from typing import Dict
+from typing import Optional
+
+_WHITESPACE = " \t\n\r"
+_NUMBER_TAIL = "0123456789.eE+-"
+
+_decoder = json.JSONDecoder()
+
+
+class _Reader:
+    """
+    A text buffer over an async stream of bytes.
+    Consumed text is dropped when more data is read, so memory stays bounded
+    by the largest single JSON value plus one chunk.
+
+    A malformed document raises json.JSONDecodeError, like json.loads.
+    """
+
+    def __init__(self, chunks: AsyncIterator[bytes]):
+        self.chunks = chunks.__aiter__()
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    async def fill(self) -> bool:
+        if self.eof:
+            return False
+
+        try:
+            chunk = await self.chunks.__anext__()
+            text = self._decode(chunk)
+        except StopAsyncIteration:
+            text = self._decode(b"", final=True)
+            self.eof = True
+
+        self.buf = self.buf[self.pos :] + text
+        self.pos = 0
+        return True
+
+    def _decode(self, chunk: bytes, final: bool = False) -> str:
+        try:
+            return self.decoder.decode(chunk, final=final)
+        except UnicodeDecodeError as err:
+            raise self.error(f"invalid UTF-8: {err.reason}") from err
+
+    def error(self, message: str) -> json.JSONDecodeError:
+        return json.JSONDecodeError(message, self.buf, self.pos)
+
+    async def peek(self) -> str:
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+
+            if not await self.fill():
+                raise self.error("unexpected end of JSON document")
+
+    async def expect(self, char: str) -> None:
+        found = await self.peek()
+        if found != char:
+            raise self.error(f"expected {char!r}, got {found!r}")
+        self.pos += 1
+
+    async def member_name(self) -> str:
+        name = await self.value()
+        if not isinstance(name, str):
+            raise self.error("expected a member name")
+        await self.expect(":")
+        return name
+
+    async def value(self) -> Any:
+        await self.peek()
+
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not await self.fill():
+                    raise
+                continue
+
+            # a number or a literal may continue in the next chunk
+            incomplete = end == len(self.buf) or (
+                isinstance(value, (int, float))
+                and not isinstance(value, bool)
+                and self.buf[end] in _NUMBER_TAIL
+            )
+            if incomplete and await self.fill():
+                continue
+
+            self.pos = end
+            return value
+
+
+async def iter_array_items(
+    chunks: AsyncIterator[bytes], key: str, members: Optional[Dict] = None
+) -> AsyncIterator:
+    """
+    Yields items of the `key` array member of a top-level JSON object
+    one by one, while the document is still being received.
+
+    Members before `key` are decoded and dropped; the rest of the document
+    after the array is not read at all. If `members` is given, the other
+    members are stored in it instead, and those after the array are read
+    once all items are consumed (not if the caller stops early).
+
+    :param chunks: an async iterator over bytes of a JSON document
+    :param key: name of the array member
+    :param members: a dict to collect the other members into
+    :return: an async iterator over decoded array items
+    """
+
+    reader = _Reader(chunks)
+    await reader.expect("{")
+
+    if await reader.peek() == "}":
+        raise reader.error(f"no {key!r} member in JSON object")
+
+    while True:
+        name = await reader.member_name()
+
+        if name != key:
+            value = await reader.value()
+            if members is not None:
+                members[name] = value
+            if await reader.peek() == "}":
+                raise reader.error(f"no {key!r} member in JSON object")
+            await reader.expect(",")
+            continue
+
+        await reader.expect("[")
+        if await reader.peek() != "]":
+            while True:
+                yield await reader.value()
+
+                if await reader.peek() == "]":
+                    break
+                await reader.expect(",")
+
+        if members is None:
+            return
+
+        await reader.expect("]")
+        while await reader.peek() != "}":
+            await reader.expect(",")
+            name = await reader.member_name()
+            members[name] = await reader.value()
+        return
@@ -1,6 +1,158 @@
+import copy
+import json
 import logging
+import logging.handlers
+import os
+import queue
+import random
+from typing import Dict
+from typing import Optional
 
-from framework.utils.settings import get_setting
+from framework.utils.config import get_settings
+from framework.utils.metrics import REGISTRY
+from framework.utils.ratelimit import TokenBucket
+
+LOG_RECORDS_DROPPED = REGISTRY.counter(
+    "log_records_dropped",
+    "Log records dropped instead of written, by reason.",
+    labels=("reason",),
+)
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats a record as a compact JSON line.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "at": f"{record.module}.{record.funcName}:{record.lineno}",
+            "msg": record.getMessage(),
+        }
+
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+
+        return json.dumps(entry, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Samples and rate-limits records per logger.
+
+    `sampling` maps logger names to the share of records below WARNING to keep;
+    `rate_limits` maps them to records per second (with a burst of as many).
+    A setting of a logger applies to its children too, unless they have their own.
+    Dropped records are counted in `log_records_dropped`.
+    """
+
+    def __init__(self, sampling: Dict[str, float], rate_limits: Dict[str, float]):
+        super().__init__()
+        self.sampling = sampling
+        self.rate_limits = rate_limits
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < logging.WARNING:
+            rate = _lookup(self.sampling, record.name)
+            if rate is not None and random.random() >= rate:
+                LOG_RECORDS_DROPPED.inc("sampled")
+                return False
+
+        name = _find_owner(self.rate_limits, record.name)
+        if name is not None and not self._get_bucket(name).take():
+            LOG_RECORDS_DROPPED.inc("rate_limited")
+            return False
+
+        return True
+
+    def _get_bucket(self, name: str) -> TokenBucket:
+        bucket = self._buckets.get(name)
+        if bucket is None:
+            bucket = self._buckets.setdefault(name, TokenBucket(self.rate_limits[name]))
+        return bucket
+
+
+def _find_owner(settings: Dict[str, float], name: str) -> Optional[str]:
+    while name not in settings:
+        if not name:
+            return None
+        name = name.rpartition(".")[0]
+    return name
+
+
+def _lookup(settings: Dict[str, float], name: str) -> Optional[float]:
+    owner = _find_owner(settings, name)
+    return None if owner is None else settings[owner]
+
+
+class _Listener(logging.handlers.QueueListener):
+    def enqueue_sentinel(self) -> None:
+        # the queue may be full: wait for the thread to make room
+        self.queue.put(self._sentinel)
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Hands records over to `handler` in a background thread through a queue
+    of `max_size` records. When the queue is full, records are dropped
+    and counted instead of blocking the caller.
+
+    The thread is started by the first record in a process,
+    so workers forked from a preloaded master get their own.
+    """
+
+    def __init__(self, handler: logging.Handler, max_size: int):
+        super().__init__(queue.Queue(max_size))
+        self.handler = handler
+        self.max_size = max_size
+        self._listener: Optional[_Listener] = None
+        self._pid: Optional[int] = None
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self._pid != os.getpid():
+            self._start()
+
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc("queue_full")
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # arguments may change after the call: render the message now,
+        # leave the rest of formatting to the background thread
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def close(self) -> None:
+        with self.lock:
+            listener, self._listener = self._listener, None
+        if listener is not None and self._pid == os.getpid():
+            listener.stop()
+        self.handler.close()
+        super().close()
+
+    def _start(self) -> None:
+        with self.lock:
+            if self._pid == os.getpid():
+                return
+            # a queue inherited from the parent process has no consumer
+            self.queue = queue.Queue(self.max_size)
+            self._listener = _Listener(
+                self.queue, self.handler, respect_handler_level=True
+            )
+            self._listener.start()
+            self._pid = os.getpid()
 
 
 def mute_root_logger():
@@ -11,9 +163,16 @@ def mute_root_logger():
 
 
 def configure_logging(logger_name: str) -> logging.Logger:
-    debug = get_setting("MODE_DEBUG")
-    if isinstance(debug, str) and debug.isdigit():
-        debug = int(debug)
+    """
+    Configures the logger to write to stderr, as text or JSON lines (LOG_FORMAT).
+
+    With LOG_QUEUE_SIZE > 0 records are written from a background thread
+    and dropped when that many are waiting. LOG_SAMPLING and LOG_RATE_LIMITS
+    thin out records of noisy loggers.
+    """
+
+    settings = get_settings()
+    debug = settings.MODE_DEBUG
 
     LEVELS = {
         True: logging.DEBUG,
@@ -36,9 +195,21 @@ def configure_logging(logger_name: str) -> logging.Logger:
     handler = logging.StreamHandler()
     handler.setLevel(lvl)
 
-    formatter = logging.Formatter(fmt=fmt, datefmt="%Y-%m-%d %H:%M:%S", style="{")
+    if settings.LOG_FORMAT == "json":
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(fmt=fmt, datefmt="%Y-%m-%d %H:%M:%S", style="{")
     handler.setFormatter(formatter)
 
+    if settings.LOG_QUEUE_SIZE > 0:
+        handler = NonBlockingQueueHandler(handler, settings.LOG_QUEUE_SIZE)
+        handler.setLevel(lvl)
+
+    if settings.log_sampling or settings.log_rate_limits:
+        handler.addFilter(
+            SamplingFilter(settings.log_sampling, settings.log_rate_limits)
+        )
+
     logger.addHandler(handler)
 
     return logger
@@ -0,0 +1,200 @@
+import bisect
+import threading
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Sequence
+from typing import Tuple
+
+LabelValues = Tuple[str, ...]
+
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{_n}="{_escape(_v)}"' for _n, _v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    @property
+    def sample_name(self) -> str:
+        return self.name
+
+    def header(self) -> List[str]:
+        return [
+            f"# HELP {self.sample_name} {self.documentation}",
+            f"# TYPE {self.sample_name} {self.kind}",
+        ]
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return self.header() + self.samples()
+
+
+class Counter(Metric):
+    """
+    A counter; its samples are named with the `_total` suffix,
+    as Prometheus expects of counters.
+    """
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values: str) -> float:
+        return self._values.get(label_values, 0)
+
+    @property
+    def sample_name(self) -> str:
+        if self.name.endswith("_total"):
+            return self.name
+        return f"{self.name}_total"
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.sample_name}{_format_labels(self.labels, _lv)} {_format_value(_v)}"
+            for _lv, _v in sorted(self._values.items())
+        ]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        # per label values: counts per bucket (+Inf last), sum
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(label_values)
+            if entry is None:
+                entry = ([0] * (len(self.buckets) + 1), [0.0])
+                self._values[label_values] = entry
+            entry[0][index] += 1
+            entry[1][0] += value
+
+    def count(self, *label_values: str) -> int:
+        entry = self._values.get(label_values)
+        return sum(entry[0]) if entry else 0
+
+    def samples(self) -> List[str]:
+        lines = []
+        for label_values, (counts, total) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                labels = _format_labels(self.labels, label_values, le)
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labels, label_values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total[0])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class CallbackGauge(Metric):
+    """
+    A gauge whose values are read from a callback at render time,
+    for state which is already counted elsewhere (queue sizes, cache stats).
+    """
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        callback: Callable[[], Dict[LabelValues, float]],
+        labels: Sequence[str] = (),
+    ):
+        super().__init__(name, documentation, labels)
+        self.callback = callback
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labels, _lv)} {_format_value(_v)}"
+            for _lv, _v in sorted(self.callback().items())
+        ]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labels=()) -> Counter:
+        return self.register(Counter(name, documentation, labels))
+
+    def histogram(self, name: str, documentation: str, labels=(), **kw) -> Histogram:
+        return self.register(Histogram(name, documentation, labels, **kw))
+
+    def gauge(self, name: str, documentation: str, callback, labels=()):
+        return self.register(CallbackGauge(name, documentation, callback, labels))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
@@ -0,0 +1,108 @@
+import gzip
+import hashlib
+from dataclasses import dataclass
+from typing import Dict
+from typing import Iterable
+from typing import Optional
+from typing import Tuple
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+from framework import dirs
+from framework.utils.config import get_settings
+
+try:
+    import brotli
+except ImportError:  # brotli is optional: without it pages are served gzipped
+    brotli = None
+
+HTML = "text/html; charset=utf-8"
+
+
+@dataclass(frozen=True)
+class Page:
+    """
+    A page rendered once, with precompressed variants and strong ETags.
+    """
+
+    variants: Dict[str, bytes]
+    etags: Dict[str, str]
+    media_type: str = HTML
+
+    @classmethod
+    def build(cls, body: bytes, media_type: str = HTML) -> "Page":
+        variants = {"identity": body, "gzip": gzip.compress(body, 9, mtime=0)}
+        if brotli is not None:
+            variants["br"] = brotli.compress(body, quality=11)
+
+        # each encoding is a representation of its own: it gets its own ETag
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        etags = {_encoding: f'"{digest}-{_encoding}"' for _encoding in variants}
+        return cls(variants=variants, etags=etags, media_type=media_type)
+
+    def response(self, request: Request) -> Response:
+        """
+        Responds with the smallest variant the client accepts,
+        or with 304 if the client already has that variant.
+        """
+
+        encoding = self.negotiate(request.headers.get("accept-encoding", ""))
+        headers = {
+            "ETag": self.etags[encoding],
+            "Cache-Control": f"public, max-age={get_settings().PAGES_MAX_AGE}",
+            "Vary": "Accept-Encoding",
+        }
+
+        if self.is_cached(request.headers.get("if-none-match"), encoding):
+            return Response(status_code=304, headers=headers)
+
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(
+            self.variants[encoding], media_type=self.media_type, headers=headers
+        )
+
+    def negotiate(self, accept_encoding: str) -> str:
+        accepted = dict(_parse_accept_encoding(accept_encoding))
+        for encoding in ("br", "gzip"):
+            if encoding in self.variants and accepted.get(encoding, 0) > 0:
+                return encoding
+        return "identity"
+
+    def is_cached(self, if_none_match: Optional[str], encoding: str) -> bool:
+        if not if_none_match:
+            return False
+        tags = {_tag.strip() for _tag in if_none_match.split(",")}
+        return "*" in tags or self.etags[encoding] in tags
+
+
+def _parse_accept_encoding(header: str) -> Iterable[Tuple[str, float]]:
+    for item in header.split(","):
+        encoding, *params = item.strip().lower().split(";")
+        quality = 1.0
+        for param in params:
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if encoding:
+            yield encoding, quality
+
+
+def render_pages(*templates: str) -> Dict[str, Page]:
+    """
+    Renders templates without per-request context into pages.
+    """
+
+    # jinja2 is only needed to build pages, not to serve them
+    from jinja2 import Environment
+    from jinja2 import FileSystemLoader
+
+    env = Environment(loader=FileSystemLoader(str(dirs.DIR_TEMPLATES)), autoescape=True)
+    return {
+        _name: Page.build(env.get_template(_name).render().encode())
+        for _name in templates
+    }
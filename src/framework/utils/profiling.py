@@ -0,0 +1,149 @@
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from types import FrameType
+from typing import Iterator
+from typing import Optional
+
+from framework.utils.config import get_settings
+
+TRUNCATED_STACK = "[truncated]"
+
+
+def collapse_stack(frame: Optional[FrameType]) -> str:
+    """
+    Formats a stack root-first in the "collapsed" format of flamegraph tools:
+    frames are separated with ";".
+    """
+
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        filename = os.path.basename(code.co_filename)
+        names.append(f"{code.co_name} ({filename}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class SamplingProfiler:
+    """
+    A statistical profiler which samples the stack of one thread
+    every `interval` seconds from a background thread.
+
+    Sampling is on while at least one session is open.
+    Samples are merged into counts of collapsed stacks; beyond `max_stacks`
+    distinct stacks new ones are counted as "[truncated]", so memory is bounded.
+
+    Note that for an asyncio worker the sampled thread runs the event loop,
+    so samples taken during a session include work of other requests too.
+    """
+
+    def __init__(
+        self,
+        interval: Optional[float] = None,
+        max_stacks: Optional[int] = None,
+    ):
+        settings = get_settings()
+        self.interval = settings.PROFILING_INTERVAL if interval is None else interval
+        self.max_stacks = (
+            settings.PROFILING_MAX_STACKS if max_stacks is None else max_stacks
+        )
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._sessions = 0
+        self._target: Optional[int] = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @contextmanager
+    def session(self) -> Iterator[None]:
+        self._open_session()
+        try:
+            yield
+        finally:
+            self._close_session()
+
+    def collapsed(self) -> str:
+        with self._lock:
+            lines = [f"{_stack} {_count}" for _stack, _count in self.stacks.items()]
+        return "\n".join(sorted(lines)) + "\n" if lines else ""
+
+    def reset(self) -> None:
+        with self._lock:
+            self.stacks.clear()
+            self.samples = 0
+
+    def _open_session(self) -> None:
+        with self._lock:
+            self._sessions += 1
+            self._target = threading.get_ident()
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="sampling-profiler", daemon=True
+                )
+                self._thread.start()
+        self._wake.set()
+
+    def _close_session(self) -> None:
+        with self._lock:
+            self._sessions -= 1
+            if not self._sessions:
+                self._wake.clear()
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait()
+            self._sample()
+            time.sleep(self.interval)
+
+    def _sample(self) -> None:
+        frame = sys._current_frames().get(self._target)
+        if frame is None:
+            return
+
+        stack = collapse_stack(frame)
+        with self._lock:
+            if stack not in self.stacks and len(self.stacks) >= self.max_stacks:
+                stack = TRUNCATED_STACK
+            self.stacks[stack] += 1
+            self.samples += 1
+
+
+_profiler: Optional[SamplingProfiler] = None
+
+
+def get_profiler() -> Optional[SamplingProfiler]:
+    """
+    Returns the profiler of this process, or None if MODE_PROFILING is off.
+    """
+
+    global _profiler
+
+    if _profiler is None and get_settings().MODE_PROFILING:
+        _profiler = SamplingProfiler()
+
+    return _profiler
+
+
+@contextmanager
+def maybe_profile(sample_rate: Optional[float] = None) -> Iterator[None]:
+    """
+    Profiles the enclosed code for a `sample_rate` share of calls,
+    when MODE_PROFILING is on.
+    """
+
+    if sample_rate is None:
+        sample_rate = get_settings().PROFILING_SAMPLE_RATE
+
+    profiler = get_profiler()
+    if profiler is None or random.random() >= sample_rate:
+        yield
+        return
+
+    with profiler.session():
+        yield
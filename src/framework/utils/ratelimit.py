@@ -0,0 +1,36 @@
+import threading
+import time
+from typing import Callable
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    Allows `rate` events per second on average, in bursts of up to `burst`
+    (by default one second worth of events). Safe to share between threads.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(rate, 1.0)
+        self.clock = clock
+        self._tokens = self.burst
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def take(self) -> bool:
+        with self._lock:
+            now = self.clock()
+            elapsed = now - self._updated
+            self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+            self._updated = now
+
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
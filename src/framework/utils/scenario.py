@@ -0,0 +1,95 @@
+import asyncio
+from dataclasses import dataclass
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
+from typing import Sequence
+from typing import Tuple
+
+
+@dataclass(frozen=True)
+class Step:
+    """
+    A node of a scenario graph.
+
+    `func` is called as `func(*args, results)` where `results` maps names
+    of already finished steps to their return values.
+    """
+
+    name: str
+    func: Callable[..., Awaitable[Any]]
+    depends: Tuple[str, ...] = ()
+
+
+def check_graph(steps: Sequence[Step]) -> None:
+    names = [step.name for step in steps]
+    if len(set(names)) != len(names):
+        raise ValueError(f"duplicate step names in {names}")
+
+    known = set()
+    for step in steps:
+        unknown = set(step.depends) - set(names)
+        if unknown:
+            raise ValueError(f"step {step.name!r} depends on unknown {sorted(unknown)}")
+
+        later = set(step.depends) - known
+        if later:
+            raise ValueError(f"step {step.name!r} must follow {sorted(later)}")
+
+        known.add(step.name)
+
+
+async def run_steps(steps: Sequence[Step], *args: Any) -> Dict[str, Any]:
+    """
+    Runs the scenario graph, starting every step as soon as its dependencies finish.
+
+    Steps must be declared in a topological order.
+    When a step fails, all running steps are cancelled and the error is re-raised.
+    If several steps fail at the same moment, the one declared first wins.
+    The failed step name is stored in the `step` attribute of the error.
+
+    :param steps: scenario steps
+    :param args: leading arguments for every step function
+    :return: results of all steps by step name
+    """
+
+    check_graph(steps)
+
+    results: Dict[str, Any] = {}
+    waiting = list(steps)
+    running: Dict[asyncio.Task, Step] = {}
+
+    try:
+        while waiting or running:
+            for step in [_s for _s in waiting if set(_s.depends) <= results.keys()]:
+                waiting.remove(step)
+                task = asyncio.ensure_future(step.func(*args, results))
+                running[task] = step
+
+            done, _pending = await asyncio.wait(
+                running, return_when=asyncio.FIRST_COMPLETED
+            )
+
+            failed = []
+            for task in done:
+                step = running.pop(task)
+                if task.exception() is None:
+                    results[step.name] = task.result()
+                else:
+                    failed.append((steps.index(step), step, task.exception()))
+
+            if failed:
+                _index, step, err = min(failed, key=lambda _f: _f[0])
+                err.step = step.name
+                raise err
+    finally:
+        for task in running:
+            task.cancel()
+        if running:
+            await asyncio.wait(running)
+        for task in running:
+            if not task.cancelled():
+                task.exception()
+
+    return results
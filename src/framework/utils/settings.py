@@ -1,5 +1,46 @@
 import os
 
+_dynaconf_settings = None
+
+
+def _get_dynaconf_settings():
+    global _dynaconf_settings
+
+    if _dynaconf_settings is None:
+        try:
+            from dynaconf import settings
+        except ImportError:
+            settings = {}
+
+        _dynaconf_settings = settings
+
+    return _dynaconf_settings
+
+
+def reload_dynaconf_settings():
+    """
+    Makes Dynaconf read its settings files again.
+    """
+
+    settings = _get_dynaconf_settings()
+    if hasattr(settings, "reload"):
+        settings.reload()
+
+
+def get_raw_setting(setting_name):
+    """
+    Returns a setting value as it is found: either in ENV, or in Dynaconf.
+
+    :param setting_name: setting name
+    :return: a value or None
+    """
+
+    value = os.getenv(setting_name)
+    if not value:
+        value = _get_dynaconf_settings().get(setting_name)
+
+    return value
+
 
 def get_setting(setting_name, default=None, convert=lambda _value: _value or None):
     """
@@ -13,14 +54,16 @@ def get_setting(setting_name, default=None, convert=lambda _value: _value or Non
     :return: a value
     """
 
-    value = os.getenv(setting_name)
-    if not value:
-        try:
-            from dynaconf import settings
+    value = get_raw_setting(setting_name) or default
+    return convert(value)
 
-            value = settings.get(setting_name)
-        except ImportError:
-            pass
 
-    value = value or default
-    return convert(value)
+def as_bool(value):
+    """
+    Converts a setting value to bool, understanding "true"/"false"-like strings from ENV.
+    """
+
+    if isinstance(value, str):
+        return value.strip().lower() in {"1", "on", "true", "yes"}
+
+    return bool(value)
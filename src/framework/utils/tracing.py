@@ -0,0 +1,194 @@
+import random
+from datetime import datetime
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from urllib.parse import urlsplit
+
+import sentry_sdk
+from sentry_sdk.envelope import Envelope
+from sentry_sdk.transport import Transport
+
+from framework.utils.config import get_settings
+from framework.utils.metrics import REGISTRY
+from framework.utils.ratelimit import TokenBucket
+
+TRACES = REGISTRY.counter(
+    "traces",
+    "Finished transactions by sampling decision.",
+    labels=("decision",),
+)
+
+# decisions which send a transaction
+KEPT = ("error", "slow", "continued", "sampled")
+
+_ERROR_STATUSES = {"internal_error", "unknown_error", "unavailable", "data_loss"}
+_TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S.%fZ"
+
+
+class TraceSampler:
+    """
+    Decides which finished transactions are sent to Sentry.
+
+    Failed transactions (5xx or an exception) and those slower than
+    `slow_threshold` seconds are always kept, as are those continuing a trace
+    sampled upstream. Others are kept with the rate of their route from
+    `route_rates` (by transaction name or URL path), or `sample_rate`,
+    and only up to `max_per_second`, so tracing costs stay bounded however
+    high the traffic. 0 for `slow_threshold` or `max_per_second` means
+    no threshold or no limit.
+
+    The decision is taken when a transaction ends, as only then its status
+    and duration are known. The price is that every request is recorded,
+    sampled or not: only sending is saved on the others. Failed and slow
+    transactions are not bounded by `max_per_second`. A request continuing
+    a trace declined upstream is not recorded, so its failures only reach
+    Sentry as error events.
+    """
+
+    def __init__(
+        self,
+        sample_rate: float,
+        route_rates: Dict[str, float],
+        slow_threshold: float,
+        max_per_second: float,
+    ):
+        self.sample_rate = sample_rate
+        self.route_rates = route_rates
+        self.slow_threshold = slow_threshold
+        self.budget = TokenBucket(max_per_second) if max_per_second > 0 else None
+
+    def traces_sampler(self, sampling_context: Dict[str, Any]) -> bool:
+        return sampling_context.get("parent_sampled") is not False
+
+    def decide(self, routes: List[str], duration: float, error: bool) -> str:
+        if error:
+            decision = "error"
+        elif self.slow_threshold and duration >= self.slow_threshold:
+            decision = "slow"
+        elif random.random() >= self.get_rate(routes):
+            decision = "dropped"
+        elif self.budget is not None and not self.budget.take():
+            decision = "over_budget"
+        else:
+            decision = "sampled"
+
+        TRACES.inc(decision)
+        return decision
+
+    def get_rate(self, routes: List[str]) -> float:
+        for route in routes:
+            if route in self.route_rates:
+                return self.route_rates[route]
+        return self.sample_rate
+
+    def keep(self, event: Dict[str, Any]) -> bool:
+        trace = (event.get("contexts") or {}).get("trace") or {}
+        status_code = (event.get("tags") or {}).get("http.status_code") or "0"
+        error = trace.get("status") in _ERROR_STATUSES or int(status_code) >= 500
+        duration = _get_duration(event)
+
+        if trace.get("parent_span_id") and not error:
+            # recorded although it has a parent: the parent sampled it
+            TRACES.inc("continued")
+            return True
+
+        routes = [event.get("transaction") or ""]
+        url = (event.get("request") or {}).get("url")
+        if url:
+            routes.append(urlsplit(url).path or "/")
+
+        return self.decide(routes, duration, error) in KEPT
+
+
+def _get_duration(event: Dict[str, Any]) -> float:
+    try:
+        started, finished = (
+            datetime.strptime(event[_key], _TIMESTAMP_FORMAT)
+            for _key in ("start_timestamp", "timestamp")
+        )
+    except (KeyError, TypeError, ValueError):
+        return 0.0
+    return (finished - started).total_seconds()
+
+
+class SamplingTransport(Transport):
+    """
+    Passes events on to the `inner` transport,
+    and transactions only if the sampler keeps them.
+    """
+
+    def __init__(self, inner: Transport, sampler: TraceSampler):
+        super().__init__(inner.options)
+        self.inner = inner
+        self.sampler = sampler
+
+    def capture_event(self, event: Dict[str, Any]) -> None:
+        self.inner.capture_event(event)
+
+    def capture_envelope(self, envelope: Envelope) -> None:
+        event = envelope.get_transaction_event()
+        if event is not None and not self.sampler.keep(event):
+            return
+        self.inner.capture_envelope(envelope)
+
+    def flush(self, timeout: float, callback: Optional[Any] = None) -> None:
+        self.inner.flush(timeout, callback)
+
+    def kill(self) -> None:
+        self.inner.kill()
+
+
+class RecordingTransport(Transport):
+    """
+    Keeps events and transactions in memory instead of sending them:
+    a local stand-in for Sentry.
+    """
+
+    def __init__(self, options: Optional[Dict[str, Any]] = None):
+        super().__init__(options)
+        self.events: List[Dict[str, Any]] = []
+        self.transactions: List[Dict[str, Any]] = []
+
+    def capture_event(self, event: Dict[str, Any]) -> None:
+        self.events.append(event)
+
+    def capture_envelope(self, envelope: Envelope) -> None:
+        event = envelope.get_transaction_event()
+        if event is not None:
+            self.transactions.append(event)
+        else:
+            self.events.append(envelope.get_event())
+
+
+def create_trace_sampler() -> TraceSampler:
+    settings = get_settings()
+    return TraceSampler(
+        sample_rate=settings.TRACES_SAMPLE_RATE,
+        route_rates=settings.traces_route_rates,
+        slow_threshold=settings.TRACES_SLOW_THRESHOLD,
+        max_per_second=settings.TRACES_MAX_PER_SECOND,
+    )
+
+
+def init_tracing(transport: Optional[Transport] = None, **options) -> TraceSampler:
+    """
+    Initialises Sentry with SENTRY_DSN, or with the given transport,
+    sampling transactions with the TraceSampler from the settings.
+    Both the WSGI and the ASGI entry points use it.
+    """
+
+    sampler = create_trace_sampler()
+    sentry_sdk.init(
+        get_settings().SENTRY_DSN or None,
+        transport=transport,
+        traces_sampler=sampler.traces_sampler,
+        **options,
+    )
+
+    client = sentry_sdk.Hub.current.client
+    if client is not None and client.transport is not None:
+        client.transport = SamplingTransport(client.transport, sampler)
+
+    return sampler
@@ -1,57 +1,272 @@
-import traceback
+import dataclasses
+import hmac
+import json
 
-import requests
-import uvicorn
 from fastapi import FastAPI
+from fastapi import Header
+from fastapi import HTTPException
 from fastapi import Request
 from fastapi.responses import HTMLResponse
-from fastapi.templating import Jinja2Templates
-from starlette.testclient import TestClient
+from fastapi.responses import JSONResponse
+from fastapi.responses import PlainTextResponse
+from fastapi.responses import StreamingResponse
 
-from framework import dirs
+from framework.supported_api.blog.history import close_history
+from framework.supported_api.blog.jobs import get_job_queue
+from framework.supported_api.blog.loadtest import run_load_test
+from framework.supported_api.blog.runner import get_cache
+from framework.supported_api.blog.runner import run_batch
+from framework.supported_api.blog.runner import run_validation
+from framework.supported_api.blog.schemas.base import BatchRequestApi
 from framework.supported_api.blog.schemas.base import JsonApiObject
+from framework.supported_api.blog.schemas.base import LoadTestRequestApi
 from framework.supported_api.blog.schemas.base import TestRequestApi
-from framework.supported_api.blog.validate_api import test_post_global
+from framework.utils.admission import admitted
+from framework.utils.admission import get_admission
+from framework.utils.admission import Rejected
+from framework.utils.config import get_settings
+from framework.utils.http import close_pool
 from framework.utils.logging import configure_logging
+from framework.utils.metrics import REGISTRY
+from framework.utils.pages import render_pages
+from framework.utils.profiling import get_profiler
+from framework.utils.profiling import maybe_profile
 from framework.utils.settings import get_setting
 
-app = FastAPI()
-client = TestClient(app)
-templates = Jinja2Templates(directory=dirs.DIR_TEMPLATES)
-
 LOGGER = configure_logging("main")
 
 
-@app.get("/", response_class=HTMLResponse)
+def check_admin(token: str) -> None:
+    """
+    Admin views are hidden unless ADMIN_TOKEN is configured
+    and the request carries it in the X-Admin-Token header.
+    """
+
+    admin_token = get_settings().ADMIN_TOKEN
+    if not admin_token or not hmac.compare_digest(token or "", admin_token):
+        raise HTTPException(status_code=404)
+
+
+async def close_http_pool():
+    await close_pool()
+
+
+async def start_job_workers():
+    await get_job_queue().start()
+
+
+async def stop_job_workers():
+    await get_job_queue().stop()
+
+
 async def view_index(request: Request):
-    return templates.TemplateResponse("index.html", context={"request": request})
+    return request.app.state.pages["index.html"].response(request)
+
+
+def get_client_id(request: Request) -> str:
+    """
+    Identifies a client for fair scheduling of validations:
+    by the X-Api-Key header if it is one of ADMISSION_CLIENT_WEIGHTS,
+    otherwise by address.
+
+    X-Forwarded-For is honoured only behind TRUSTED_PROXY_HOPS trusted proxies:
+    each appends the address it got the request from, so the entry that many
+    from the end is the one the outermost trusted proxy has seen, and entries
+    before it may be forged by the client.
+    """
+
+    settings = get_settings()
+    api_key = request.headers.get("x-api-key")
+    if api_key and f"key:{api_key}" in settings.client_weights:
+        return f"key:{api_key}"
+
+    hops = settings.TRUSTED_PROXY_HOPS
+    forwarded = request.headers.get("x-forwarded-for")
+    if hops > 0 and forwarded:
+        addresses = [_a.strip() for _a in forwarded.split(",")]
+        return f"ip:{addresses[max(0, len(addresses) - hops)]}"
+
+    return f"ip:{request.client.host if request.client else ''}"
 
 
-@app.post("/")
 async def view_test(
     req: TestRequestApi,
+    request: Request,
 ) -> JsonApiObject:  # TODO: use a specific API obj
-    LOGGER.debug(req)
     test_api_server = req.data.url
+    LOGGER.debug("validate %s", test_api_server)
+
+    async with admitted(get_client_id(request)):
+        with maybe_profile():
+            return await run_validation(
+                test_api_server,
+                fresh=req.data.fresh,
+                timings=req.data.timings,
+                tb=req.data.tb,
+            )
+
+
+async def view_metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+async def view_profile(reset: bool = False, x_admin_token: str = Header(None)):
+    """
+    Returns aggregated samples as collapsed stacks, ready for flamegraph.pl
+    or speedscope. Pass reset=true to start a new profile.
+    """
+
+    check_admin(x_admin_token)
+    profiler = get_profiler()
+    if profiler is None:
+        raise HTTPException(status_code=404)
+
+    collapsed = profiler.collapsed()
+    if reset:
+        profiler.reset()
+
+    return PlainTextResponse(collapsed)
+
+
+async def view_cache_stats() -> JsonApiObject:
+    cache = get_cache()
+    resp = JsonApiObject(data=cache.stats() if cache else {})
+    return resp
+
+
+async def view_admission_stats() -> JsonApiObject:
+    admission = get_admission()
+    resp = JsonApiObject(data=admission.stats() if admission else {})
+    return resp
+
 
-    resp = JsonApiObject()
+async def handle_rejected(_request: Request, err: Rejected) -> JSONResponse:
+    resp = JsonApiObject(errors=[err.reason])
+    return JSONResponse(
+        resp.dict(),
+        status_code=err.status_code,
+        headers={"Retry-After": str(err.retry_after)},
+    )
+
+
+async def view_batch(req: BatchRequestApi, request: Request):
+    LOGGER.debug("validate a batch of %s urls", len(req.data.urls))
+    settings = get_settings()
+    urls = req.data.urls
+    concurrency = min(
+        req.data.concurrency or settings.BATCH_CONCURRENCY,
+        settings.BATCH_CONCURRENCY,
+    )
+
+    if len(urls) > settings.BATCH_MAX_URLS:
+        resp = JsonApiObject(
+            errors=[f"too many urls, max is {settings.BATCH_MAX_URLS}"]
+        )
+        return JSONResponse(resp.dict(), status_code=413)
+
+    async def stream_results():
+        async for url, resp in run_batch(urls, concurrency, get_client_id(request)):
+            line = {"url": url, **resp.dict()}
+            yield json.dumps(line) + "\n"
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+
+async def view_load_test(
+    req: LoadTestRequestApi,
+    request: Request,
+    x_admin_token: str = Header(None),
+) -> JsonApiObject:
+    """
+    Load tests drive traffic at the given url: they are for admins only.
+    """
+
+    check_admin(x_admin_token)
+    LOGGER.debug(req)
 
     try:
-        test_post_global(test_api_server)
-    except AssertionError as err:
-        tb = traceback.format_exc().split("\n")
-        resp.data = {"ok": False, "description": str(err), "tb": tb}
-    except (requests.Timeout, requests.ConnectionError):
-        tb = traceback.format_exc().split("\n")
-        resp.data = {"ok": False, "description": "your api is down", "tb": tb}
-    except Exception as err:
-        tb = traceback.format_exc()
-        resp.errors = ["our server fault", str(err), tb]
-    else:
-        resp.data = {"ok": True, "description": "hemos pasado", "tb": None}
+        async with admitted(get_client_id(request)):
+            report = await run_load_test(req.data)
+    except (AssertionError, ValueError) as err:
+        resp = JsonApiObject(errors=[str(err)])
+        return resp
+
+    resp = JsonApiObject(data=report)
+    return resp
+
 
+async def view_submit_job(req: TestRequestApi) -> JsonApiObject:
+    LOGGER.debug(req)
+    job = await get_job_queue().submit(
+        req.data.url, fresh=req.data.fresh, timings=req.data.timings, tb=req.data.tb
+    )
+
+    resp = JsonApiObject(data=dataclasses.asdict(job))
     return resp
 
 
+async def view_job(job_id: str, wait: float = 0) -> JsonApiObject:
+    """
+    Returns a job; with `wait`, holds the request up to that many seconds
+    until the job is finished.
+    """
+
+    queue = get_job_queue()
+    wait = min(max(wait, 0), get_settings().JOBS_MAX_WAIT)
+    job = await (queue.wait(job_id, wait) if wait else queue.get(job_id))
+    if job is None:
+        raise HTTPException(status_code=404)
+
+    resp = JsonApiObject(data=dataclasses.asdict(job))
+    return resp
+
+
+def create_app() -> FastAPI:
+    """
+    Builds the application.
+
+    Only modules needed to serve requests are imported at module level,
+    so the app is cheap to build and can be preloaded by the gunicorn master:
+    network clients, caches and profiler threads are created lazily in workers.
+    """
+
+    app = FastAPI()
+    # the index page has no per-request content: it is rendered once,
+    # in the gunicorn master if the app is preloaded
+    app.state.pages = render_pages("index.html")
+    app.add_exception_handler(Rejected, handle_rejected)
+    app.add_event_handler("startup", start_job_workers)
+    app.add_event_handler("shutdown", stop_job_workers)
+    app.add_event_handler("shutdown", close_history)
+    app.add_event_handler("shutdown", close_http_pool)
+
+    app.add_api_route("/", view_index, methods=["GET"], response_class=HTMLResponse)
+    app.add_api_route("/", view_test, methods=["POST"])
+    app.add_api_route("/batch/", view_batch, methods=["POST"])
+    app.add_api_route("/loadtest/", view_load_test, methods=["POST"])
+    app.add_api_route("/jobs/", view_submit_job, methods=["POST"], status_code=202)
+    app.add_api_route("/jobs/{job_id}", view_job)
+    app.add_api_route("/metrics", view_metrics, response_class=PlainTextResponse)
+    app.add_api_route("/stats/cache/", view_cache_stats)
+    app.add_api_route("/stats/admission/", view_admission_stats)
+    app.add_api_route("/admin/profile/", view_profile, response_class=PlainTextResponse)
+
+    if get_settings().SENTRY_DSN:
+        # Sentry is slow to import: only when it is used
+        from sentry_sdk.integrations.asgi import SentryAsgiMiddleware
+
+        from framework.utils.tracing import init_tracing
+
+        init_tracing()
+        app.add_middleware(SentryAsgiMiddleware)
+
+    return app
+
+
+app = create_app()
+
+
 if __name__ == "__main__":
+    import uvicorn
+
     uvicorn.run(app, host="0.0.0.0", port=get_setting("PORT"))
@@ -1,11 +1,11 @@
-import sentry_sdk
+from sentry_sdk.integrations.wsgi import SentryWsgiMiddleware
 
-from framework.utils.settings import get_setting
+from framework.utils.tracing import init_tracing
 
-sentry_sdk.init(get_setting("SENTRY_DSN"), traces_sample_rate=1.0)
+init_tracing()
 
 
-def application(environ, start_response):
+def serve(environ, start_response):
     if environ["PATH_INFO"] == "/e/":
         division = 1 / 0
 
@@ -33,3 +33,6 @@ def application(environ, start_response):
     start_response(status, list(headers.items()))
 
     yield payload
+
+
+application = SentryWsgiMiddleware(serve)
@@ -1,3 +1,4 @@
+import gc
 from multiprocessing import cpu_count
 
 from framework.dirs import DIR_SRC
@@ -9,8 +10,15 @@ chdir = DIR_SRC.as_posix()
 graceful_timeout = 10
 max_requests = 200
 max_requests_jitter = 20
+preload_app = True
 pythonpath = DIR_SRC.as_posix()
 reload = False
 timeout = 30
 worker_class = "uvicorn.workers.UvicornWorker"
 workers = get_setting("WEB_CONCURRENCY", cpu_count() * 2 + 1, convert=int)
+
+
+def pre_fork(_server, _worker):
+    # objects of the preloaded app are shared with workers copy-on-write:
+    # keep the GC from touching (and so copying) their memory pages
+    gc.freeze()
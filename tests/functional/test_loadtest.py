@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from benchmarks.fake_api import FakeApiConfig
+from benchmarks.fake_api import FakeApiServer
+from framework.supported_api.blog import loadtest
+from framework.supported_api.blog.loadtest import check_params
+from framework.supported_api.blog.loadtest import run_load_test
+from framework.supported_api.blog.schemas.base import LoadTestRequest
+from framework.utils import config
+from framework.utils.admission import Rejected
+from framework.utils.http import close_pool
+from main import main
+
+
+async def _load_test(params: LoadTestRequest) -> dict:
+    try:
+        return await run_load_test(params)
+    finally:
+        await close_pool()
+
+
+def test_load_test_is_capped():
+    params = LoadTestRequest(url="http://a.example", users=1000, duration=3600)
+
+    assert len(check_params(params)) == 2
+    with pytest.raises(ValueError, match="users must be"):
+        asyncio.run(run_load_test(params))
+
+
+@pytest.fixture
+def ledger_file(monkeypatch, tmp_path):
+    settings = config.Settings(LOADTEST_SQLITE_PATH=str(tmp_path / "ledger.sqlite3"))
+    monkeypatch.setattr(config, "_settings", settings)
+    monkeypatch.setattr(loadtest, "_ledger", None)
+
+
+def test_ledger_limits_running_tests_and_targets(ledger_file):
+    ledger = loadtest.get_load_test_ledger()
+
+    first = ledger.start("http://a.example")
+    with pytest.raises(Rejected, match="too many load tests"):
+        ledger.start("http://b.example")
+
+    ledger.finish(first)
+    with pytest.raises(Rejected, match="recently") as info:
+        ledger.start("http://a.example")
+    assert 290 < info.value.retry_after <= 300
+    ledger.start("http://b.example")
+
+
+@pytest.mark.functional
+def test_load_test_reports_endpoints(ledger_file):
+    with FakeApiServer(FakeApiConfig(posts=10)) as server:
+        params = LoadTestRequest(url=server.url, users=2, duration=5, requests=20)
+        report = asyncio.run(_load_test(params))
+
+    assert report["requests"] == 20
+    assert sum(_e["requests"] for _e in report["endpoints"].values()) == 20
+    assert report["iterations"]["ok"] >= 3
+    assert "failed" not in report["iterations"]
+    assert set(report["endpoints"]) == {
+        "authors",
+        "create",
+        "list",
+        "get_by_id",
+        "cleanup",
+    }
+    assert report["endpoints"]["list"]["error_rate"] == 0
+    assert report["endpoints"]["cleanup"]["error_rate"] == 0
+
+
+def test_load_test_is_for_admins(monkeypatch):
+    monkeypatch.setattr(config, "_settings", config.Settings(ADMIN_TOKEN="secret"))
+    client = TestClient(main.app)
+    body = {"data": {"url": "http://a.example"}}
+
+    resp = client.post("/loadtest/", json=body, headers={"X-Admin-Token": "wrong"})
+
+    assert resp.status_code == 404
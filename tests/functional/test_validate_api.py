@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+from benchmarks.fake_api import FakeApiConfig
+from benchmarks.fake_api import FakeApiServer
+from framework.supported_api.blog import validate_api
+from framework.supported_api.blog.timings import collect_timings
+from framework.utils import config
+from framework.utils.http import close_pool
+
+
+async def _validate(url: str) -> None:
+    try:
+        await validate_api.test_post_global(url)
+    finally:
+        await close_pool()
+
+
+@pytest.mark.functional
+def test_valid_api_passes():
+    with FakeApiServer(FakeApiConfig(posts=50)) as server:
+        asyncio.run(_validate(server.url))
+
+
+@pytest.mark.functional
+def test_broken_api_fails():
+    with FakeApiServer(FakeApiConfig(error_rate=1.0)) as server:
+        with pytest.raises(AssertionError, match="500"):
+            asyncio.run(_validate(server.url))
+
+
+@pytest.mark.functional
+@pytest.mark.parametrize("stream", [True, False])
+def test_paginated_api_is_read_page_by_page(monkeypatch, stream):
+    monkeypatch.setattr(config, "_settings", config.Settings(API_STREAM_POSTS=stream))
+
+    with FakeApiServer(FakeApiConfig(posts=45, page_size=10)) as server:
+        with collect_timings() as timings:
+            asyncio.run(_validate(server.url))
+
+    assert [_t.step for _t in timings].count("list") == 5
+
+
+@pytest.mark.functional
+def test_newest_first_stops_at_first_page_and_cleans_up(monkeypatch):
+    settings = config.Settings(API_PAGE_SORT="-id", API_CLEANUP_POSTS=True)
+    monkeypatch.setattr(config, "_settings", settings)
+
+    with FakeApiServer(FakeApiConfig(posts=45, page_size=10)) as server:
+        with collect_timings() as timings:
+            asyncio.run(_validate(server.url))
+            asyncio.run(_validate(server.url))
+
+    steps = [_t.step for _t in timings]
+    assert steps.count("list") == 2
+    assert steps.count("cleanup") == 2
+    assert {_t.outcome for _t in timings} == {"ok"}
@@ -0,0 +1,116 @@
+import asyncio
+
+import pytest
+from starlette.requests import Request
+
+from framework.utils import config
+from framework.utils.admission import AdmissionController
+from framework.utils.admission import Rejected
+from main.main import get_client_id
+
+
+async def _hold(controller: AdmissionController, release: asyncio.Event, log: list):
+    async with controller.admit():
+        log.append("in")
+        await release.wait()
+
+
+def test_requests_wait_for_a_slot_in_order():
+    async def scenario():
+        controller = AdmissionController(max_inflight=1, max_queue=2, queue_timeout=1)
+        release = asyncio.Event()
+        log = []
+
+        first = asyncio.ensure_future(_hold(controller, release, log))
+        second = asyncio.ensure_future(_hold(controller, release, log))
+        await asyncio.sleep(0)
+        stats_while_busy = controller.stats()
+
+        release.set()
+        await asyncio.gather(first, second)
+        return stats_while_busy, controller.stats(), log
+
+    busy, idle, log = asyncio.run(scenario())
+    assert (busy["inflight"], busy["queued"]) == (1, 1)
+    assert (idle["inflight"], idle["queued"]) == (0, 0)
+    assert log == ["in", "in"]
+
+
+def test_full_queue_and_deadline_reject():
+    async def scenario():
+        controller = AdmissionController(
+            max_inflight=1, max_queue=1, queue_timeout=0.01
+        )
+        release = asyncio.Event()
+        holder = asyncio.ensure_future(_hold(controller, release, []))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(_hold(controller, release, []))
+        await asyncio.sleep(0)
+
+        with pytest.raises(Rejected) as full:
+            await _hold(controller, release, [])
+        with pytest.raises(Rejected) as late:
+            await waiter
+
+        release.set()
+        await holder
+        return full.value, late.value, controller.stats()
+
+    full, late, stats = asyncio.run(scenario())
+    assert (full.status_code, late.status_code) == (429, 503)
+    assert full.retry_after >= 1
+    assert (stats["inflight"], stats["queued"]) == (0, 0)
+
+
+def test_slots_are_shared_fairly_between_clients():
+    async def scenario(weights):
+        controller = AdmissionController(max_inflight=1, max_queue=10, queue_timeout=1)
+        release = asyncio.Event()
+        order = []
+
+        async def run(client, name):
+            async with controller.admit(client, weights.get(client, 1.0)):
+                order.append(name)
+                await asyncio.sleep(0)
+
+        holder = asyncio.ensure_future(_hold(controller, release, []))
+        await asyncio.sleep(0)
+        tasks = [asyncio.ensure_future(run("ci", f"ci{_i}")) for _i in range(4)]
+        tasks += [asyncio.ensure_future(run("user", f"user{_i}")) for _i in range(2)]
+        await asyncio.sleep(0)
+
+        release.set()
+        await asyncio.gather(holder, *tasks)
+        return order
+
+    assert asyncio.run(scenario({})) == ["ci0", "user0", "ci1", "user1", "ci2", "ci3"]
+    assert asyncio.run(scenario({"user": 2})) == [
+        "user0",
+        "ci0",
+        "user1",
+        "ci1",
+        "ci2",
+        "ci3",
+    ]
+
+
+def _client_id(forwarded: str) -> str:
+    scope = {
+        "type": "http",
+        "headers": [(b"x-forwarded-for", forwarded.encode())],
+        "client": ("10.0.0.1", 5000),
+    }
+    return get_client_id(Request(scope))
+
+
+def test_forwarded_for_is_ignored_without_trusted_proxies(monkeypatch):
+    monkeypatch.setattr(config, "_settings", config.Settings())
+
+    assert _client_id("6.6.6.6") == "ip:10.0.0.1"
+
+
+def test_forwarded_for_is_read_behind_trusted_proxies(monkeypatch):
+    monkeypatch.setattr(config, "_settings", config.Settings(TRUSTED_PROXY_HOPS=2))
+
+    assert _client_id("6.6.6.6, 1.2.3.4, 10.0.0.2") == "ip:1.2.3.4"
+    assert _client_id("1.2.3.4") == "ip:1.2.3.4"
@@ -0,0 +1,103 @@
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+
+from framework.supported_api.blog import runner
+from framework.supported_api.blog.schemas.base import JsonApiObject
+from framework.utils import admission
+from framework.utils import config
+from framework.utils.admission import AdmissionController
+from main import main
+
+
+def _patch_validation(monkeypatch, delays):
+    state = {"running": 0, "peak": 0, "started": [], "cancelled": []}
+
+    async def fake_validation(url):
+        state["started"].append(url)
+        state["running"] += 1
+        state["peak"] = max(state["peak"], state["running"])
+        try:
+            await asyncio.sleep(delays[url])
+        except asyncio.CancelledError:
+            state["cancelled"].append(url)
+            raise
+        finally:
+            state["running"] -= 1
+        return JsonApiObject(data={"ok": True})
+
+    monkeypatch.setattr(runner, "run_validation", fake_validation)
+    return state
+
+
+async def _collect(urls, concurrency, limit=None):
+    results = []
+    batch = runner.run_batch(urls, concurrency)
+    async for url, resp in batch:
+        results.append(url)
+        if len(results) == limit:
+            break
+    await batch.aclose()
+    # let cancelled validations unwind
+    await asyncio.sleep(0)
+    return results
+
+
+def test_batch_is_bounded_and_yields_in_completion_order(monkeypatch):
+    monkeypatch.setattr(config, "_settings", config.Settings(ADMISSION_MAX_INFLIGHT=0))
+    delays = {"http://a": 0.06, "http://b": 0.01, "http://c": 0.03, "http://d": 0.0}
+    state = _patch_validation(monkeypatch, delays)
+
+    results = asyncio.run(_collect(list(delays), concurrency=2))
+
+    assert state["peak"] == 2
+    assert results == ["http://b", "http://c", "http://d", "http://a"]
+
+
+def test_batch_cancels_unfinished_validations(monkeypatch):
+    monkeypatch.setattr(config, "_settings", config.Settings(ADMISSION_MAX_INFLIGHT=0))
+    delays = {"http://a": 0.0, "http://b": 10, "http://c": 10}
+    state = _patch_validation(monkeypatch, delays)
+
+    results = asyncio.run(_collect(list(delays), concurrency=3, limit=1))
+
+    assert results == ["http://a"]
+    assert sorted(state["cancelled"]) == ["http://b", "http://c"]
+
+
+def test_batch_admits_each_url(monkeypatch):
+    delays = {"http://a": 0.05, "http://b": 0.05}
+    _patch_validation(monkeypatch, delays)
+    controller = AdmissionController(max_inflight=1, max_queue=0, queue_timeout=1)
+    monkeypatch.setattr(admission, "_controller", controller)
+
+    async def scenario():
+        return [_item async for _item in runner.run_batch(list(delays), 2)]
+
+    results = dict(asyncio.run(scenario()))
+
+    assert sorted(_r.errors is None for _r in results.values()) == [False, True]
+    assert ["too many requests"] in [_r.errors for _r in results.values()]
+
+
+def test_too_large_batch_is_rejected(monkeypatch):
+    monkeypatch.setattr(config, "_settings", config.Settings(BATCH_MAX_URLS=1))
+    client = TestClient(main.app)
+
+    resp = client.post("/batch/", json={"data": {"urls": ["http://a", "http://b"]}})
+
+    assert resp.status_code == 413
+    assert resp.json()["errors"] == ["too many urls, max is 1"]
+
+
+def test_batch_streams_ndjson(monkeypatch):
+    monkeypatch.setattr(config, "_settings", config.Settings(ADMISSION_MAX_INFLIGHT=0))
+    _patch_validation(monkeypatch, {"http://a": 0.0})
+    client = TestClient(main.app)
+
+    resp = client.post("/batch/", json={"data": {"urls": ["http://a"]}})
+
+    assert resp.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(_line) for _line in resp.text.splitlines()]
+    assert lines == [{"url": "http://a", "data": {"ok": True}, "errors": None}]
@@ -0,0 +1,134 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from framework.supported_api.blog import validate_api
+from framework.supported_api.blog.schemas.posts import Post
+from framework.supported_api.blog.timings import CallTiming
+from framework.utils import breaker
+from framework.utils.breaker import CircuitOpenError
+from framework.utils.breaker import HealthTracker
+from framework.utils.http import ClientPool
+from framework.utils.http import close_pool
+from framework.utils.http import use_pool
+
+URL = "http://down.example/api/v1/user/"
+
+
+def _tracker(**kw) -> HealthTracker:
+    params = dict(
+        failure_threshold=2,
+        reset_timeout=10,
+        default_timeout=2,
+        min_timeout=0.5,
+        max_timeout=5,
+        factor=3,
+        quantile=0.99,
+        window=10,
+        min_samples=3,
+        max_hosts=10,
+    )
+    params.update(kw)
+    return HealthTracker(**params)
+
+
+def _fail(tracker: HealthTracker, error: Exception) -> None:
+    with pytest.raises(type(error)):
+        with tracker.call(URL, "authors"):
+            raise error
+
+
+def test_circuit_opens_and_recovers_after_probe(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(breaker.time, "monotonic", lambda: now[0])
+    tracker = _tracker()
+
+    _fail(tracker, httpx.ConnectError("refused"))
+    _fail(tracker, httpx.ReadTimeout("slow"))
+    with pytest.raises(CircuitOpenError):
+        with tracker.call(URL, "authors"):
+            pass
+
+    now[0] += 10
+    with tracker.call(URL, "authors"):
+        # other calls wait for the result of the probe
+        with pytest.raises(CircuitOpenError):
+            with tracker.call(URL, "list"):
+                pass
+
+    assert tracker.states() == {"closed": 1, "open": 0, "half_open": 0}
+
+
+def test_failed_probe_opens_circuit_again(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(breaker.time, "monotonic", lambda: now[0])
+    tracker = _tracker(failure_threshold=1)
+
+    _fail(tracker, httpx.ConnectError("refused"))
+    now[0] += 10
+    _fail(tracker, httpx.ConnectError("refused"))
+
+    with pytest.raises(CircuitOpenError):
+        with tracker.call(URL, "authors"):
+            pass
+
+
+def test_timeouts_adapt_to_latency_within_bounds():
+    tracker = _tracker()
+    health = tracker.get("http://down.example")
+    assert tracker.get_timeout(health, "list") == 2
+
+    health.latencies["list"] = [0.4, 0.5, 0.6]
+    assert tracker.get_timeout(health, "list") == pytest.approx(1.8)
+
+    health.latencies["list"] = [0.01] * 3
+    assert tracker.get_timeout(health, "list") == 0.5
+
+    health.latencies["list"] = [4.0] * 3
+    assert tracker.get_timeout(health, "list") == 5
+
+    _fail(tracker, httpx.ReadTimeout("slow"))
+    health.latencies["authors"] = [0.1] * 3
+    _fail(tracker, httpx.ReadTimeout("slow"))
+    assert tracker.get_timeout(health, "authors") == 2
+
+
+class _Body(httpx.AsyncByteStream):
+    def __init__(self, *chunks):
+        self.chunks = chunks
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            if isinstance(chunk, Exception):
+                raise chunk
+            yield chunk
+
+
+@pytest.mark.parametrize(
+    "body, error, failures",
+    [
+        (_Body(b'{"data": [', httpx.ReadTimeout("slow")), httpx.ReadTimeout, 1),
+        (_Body(b'{"data": [', httpx.ReadError("reset")), httpx.ReadError, 1),
+        (_Body(b'{"data": [}'), json.JSONDecodeError, 0),
+    ],
+)
+def test_errors_while_streaming_the_body_are_tracked(
+    monkeypatch, body, error, failures
+):
+    tracker = _tracker()
+    monkeypatch.setattr(breaker, "_tracker", tracker)
+    transport = httpx.MockTransport(lambda _request: httpx.Response(200, stream=body))
+    post = Post(id=1, author_id=1, content="x")
+
+    async def scenario():
+        await use_pool(ClientPool(transport=transport, record=False))
+        try:
+            await validate_api.stream_posts(URL, post, CallTiming("list"))
+        finally:
+            await close_pool()
+
+    with pytest.raises(error):
+        asyncio.run(scenario())
+    assert tracker.get("http://down.example").failures == failures
@@ -0,0 +1,55 @@
+import asyncio
+
+from framework.utils.cache import ResultCache
+
+
+def test_concurrent_calls_share_one_computation():
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return len(calls)
+
+    async def scenario():
+        cache = ResultCache(ttl=60, max_size=10)
+        results = await asyncio.gather(
+            *(cache.get_or_compute("key", compute) for _ in range(5))
+        )
+        cached = await cache.get_or_compute("key", compute)
+        fresh = await cache.get_or_compute("key", compute, fresh=True)
+        return cache, results, cached, fresh
+
+    cache, results, cached, fresh = asyncio.run(scenario())
+    assert results == [1] * 5
+    assert cached == 1
+    assert fresh == 2
+    assert cache.stats() == {
+        "hits": 1,
+        "misses": 2,
+        "coalesced": 4,
+        "size": 1,
+        "inflight": 0,
+    }
+
+
+def test_lru_bound_and_uncacheable_results():
+    async def scenario():
+        cache = ResultCache(ttl=60, max_size=2)
+        for key in "abc":
+            await cache.get_or_compute(key, lambda: asyncio.sleep(0, key))
+        await cache.get_or_compute("d", lambda: asyncio.sleep(0, None), cacheable=bool)
+        return cache
+
+    cache = asyncio.run(scenario())
+    assert list(cache._entries) == ["b", "c"]
+
+
+def test_expired_results_are_recomputed():
+    async def scenario():
+        cache = ResultCache(ttl=0, max_size=2)
+        first = await cache.get_or_compute("a", lambda: asyncio.sleep(0, 1))
+        second = await cache.get_or_compute("a", lambda: asyncio.sleep(0, 2))
+        return first, second
+
+    assert asyncio.run(scenario()) == (1, 2)
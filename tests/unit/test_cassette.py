@@ -0,0 +1,37 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from framework.utils import config
+from framework.utils.cassette import Cassette
+from framework.utils.cassette import CassettePlayer
+from framework.utils.cassette import CassetteRecorder
+from framework.utils.cassette import recording
+
+
+def _echo(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(201, json={"data": json.loads(request.content)})
+
+
+def test_recorded_exchanges_are_replayed(monkeypatch, tmp_path):
+    monkeypatch.setattr(config, "_settings", config.Settings(CASSETTE_RECORD_DIR="x"))
+    recorder = CassetteRecorder(httpx.MockTransport(_echo))
+
+    async def post(transport, content: str):
+        async with httpx.AsyncClient(transport=transport) as client:
+            url = "http://blog.example/post/"
+            resp = await client.post(url, json={"content": content})
+            return resp.json()
+
+    with recording("http://blog.example") as cassette:
+        assert asyncio.run(post(recorder, "old")) == {"data": {"content": "old"}}
+
+    cassette.save(tmp_path / "c.jsonl.gz")
+    player = CassettePlayer(Cassette.load(tmp_path / "c.jsonl.gz"))
+
+    # values the scenario generates anew are substituted in responses
+    assert asyncio.run(post(player, "new")) == {"data": {"content": "new"}}
+    with pytest.raises(httpx.ConnectError):
+        asyncio.run(post(player, "new"))
@@ -0,0 +1,56 @@
+import sqlite3
+import threading
+
+import pytest
+
+from framework.utils.dbpool import ConnectionPool
+
+
+def test_pool_reuses_connections():
+    pool = ConnectionPool(lambda: sqlite3.connect(":memory:"), max_size=2)
+
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        pass
+
+    assert first is second
+    assert pool.stats() == {"open": 1, "idle": 1}
+
+
+def test_pool_is_bounded():
+    pool = ConnectionPool(
+        lambda: sqlite3.connect(":memory:", check_same_thread=False),
+        max_size=1,
+        timeout=0.01,
+    )
+    taken = threading.Event()
+    release = threading.Event()
+
+    def hold():
+        with pool.connection():
+            taken.set()
+            release.wait()
+
+    thread = threading.Thread(target=hold)
+    thread.start()
+    taken.wait()
+    with pytest.raises(TimeoutError):
+        with pool.connection():
+            pass
+    release.set()
+    thread.join()
+
+
+def test_pool_rolls_back_on_errors():
+    pool = ConnectionPool(lambda: sqlite3.connect(":memory:"), max_size=1)
+    with pool.connection() as connection:
+        connection.execute("CREATE TABLE t (x INTEGER)")
+
+    with pytest.raises(ZeroDivisionError):
+        with pool.connection() as connection:
+            connection.execute("INSERT INTO t VALUES (1)")
+            1 / 0
+
+    with pool.connection() as connection:
+        assert connection.execute("SELECT count(*) FROM t").fetchone() == (0,)
@@ -0,0 +1,103 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from framework.supported_api.blog import runner
+from framework.supported_api.blog.failures import CheckFailed
+from framework.supported_api.blog.failures import Failure
+from framework.utils import config
+from framework.utils.http import ClientPool
+from framework.utils.http import close_pool
+from framework.utils.http import use_pool
+
+
+def _fail():
+    raise CheckFailed("wrong status", kind="status", expected=[200], actual=500)
+
+
+def test_failure_is_built_from_check():
+    with pytest.raises(CheckFailed) as info:
+        _fail()
+    info.value.step = "list"
+
+    failure = Failure.from_error(info.value)
+
+    assert failure.report() == {
+        "step": "list",
+        "kind": "status",
+        "expected": [200],
+        "actual": 500,
+        "status": None,
+    }
+    assert failure._tb is None
+    assert "_fail" in "\n".join(failure.format_traceback())
+
+
+def test_traceback_is_sent_on_request(monkeypatch):
+    async def broken_target(_url):
+        _fail()
+
+    settings = config.Settings(RESULT_CACHE_TTL=0, HISTORY_ENABLED=False)
+    monkeypatch.setattr(config, "_settings", settings)
+    monkeypatch.setattr(runner, "test_post_global", broken_target)
+
+    brief = asyncio.run(runner.run_validation("http://a.example"))
+    full = asyncio.run(runner.run_validation("http://a.example", tb=True))
+
+    assert brief.data["ok"] is False
+    assert brief.data["failure"]["kind"] == "status"
+    assert brief.data["tb"] is None
+    assert any("wrong status" in _line for _line in full.data["tb"])
+
+
+def test_malformed_post_list_is_a_target_failure(monkeypatch):
+    created = {}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/api/v1/user/":
+            return httpx.Response(200, json={"data": [{"id": 1}]})
+        if request.method == "POST":
+            created.update(json.loads(request.content)["data"], id=1)
+            return httpx.Response(201, json={"data": created})
+        if request.url.path.endswith("/1"):
+            return httpx.Response(200, json={"data": created})
+        # the post list is cut short
+        return httpx.Response(
+            200, content=b'{"data": [{"id": 2, "author_id": 1, "content": "x"}'
+        )
+
+    async def scenario():
+        await use_pool(ClientPool(transport=httpx.MockTransport(handler)))
+        try:
+            return await runner.run_validation("http://truncated.example")
+        finally:
+            await close_pool()
+
+    settings = config.Settings(
+        API_STREAM_POSTS=True, RESULT_CACHE_TTL=0, HISTORY_ENABLED=False
+    )
+    monkeypatch.setattr(config, "_settings", settings)
+
+    resp = asyncio.run(scenario())
+
+    assert resp.errors is None
+    assert resp.data["ok"] is False
+    assert resp.data["failure"]["step"] == "list"
+    assert resp.data["failure"]["kind"] == "json"
+
+
+@pytest.mark.parametrize("url", ["http://host:abc/", "http://[::1"])
+def test_invalid_url_is_a_failed_check(monkeypatch, url):
+    settings = config.Settings(HISTORY_ENABLED=False)
+    monkeypatch.setattr(config, "_settings", settings)
+    monkeypatch.setattr(runner, "_cache", None)
+
+    assert runner.normalize_url(f" {url}") == url
+
+    resp = asyncio.run(runner.run_validation(url))
+
+    assert resp.data["ok"] is False
+    assert resp.data["failure"]["kind"] == "url"
+    assert "is not valid" in resp.data["description"]
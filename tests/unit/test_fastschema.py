@@ -0,0 +1,62 @@
+import pytest
+from pydantic import ValidationError
+
+from framework.supported_api.blog.schemas.posts import PostApi
+from framework.supported_api.blog.schemas.posts import PostListApi
+from framework.utils.fastschema import CompiledModel
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        {"data": [{"id": 1, "author_id": 2, "content": "x", "extra": 3}]},
+        {"data": [{"author_id": 2, "content": "x"}], "errors": None},
+        {"data": [{"id": "1", "author_id": 2.0, "content": "x"}]},
+        {"data": [{"id": True, "author_id": 2, "content": "x"}]},
+        {"data": [], "errors": ["a"]},
+    ],
+)
+def test_same_result_as_parse_obj(payload):
+    compiled = CompiledModel(PostListApi)
+
+    assert compiled.parse(payload) == PostListApi.parse_obj(payload)
+    assert compiled.parse(payload).dict() == PostListApi.parse_obj(payload).dict()
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        None,
+        {},
+        {"data": {"author_id": 2}},
+        {"data": {"author_id": "two", "content": "x"}},
+    ],
+)
+def test_invalid_payload_raises_pydantic_error(payload):
+    compiled = CompiledModel(PostApi)
+
+    assert not compiled.check(payload)
+    with pytest.raises(ValidationError):
+        compiled.parse(payload)
+
+
+def test_fast_path_builds_nested_models():
+    compiled = CompiledModel(PostApi)
+    payload = {"data": {"id": 1, "author_id": 2, "content": "x"}}
+
+    assert compiled.check(payload)
+    obj = compiled.parse(payload)
+    assert obj.data.id == 1
+    assert obj.errors is None
+
+
+def test_fast_path_accepts_pagination_links():
+    compiled = CompiledModel(PostListApi)
+    payload = {
+        "data": [{"id": 1, "author_id": 2, "content": "x"}],
+        "links": {"next": "/?page[number]=2", "prev": None, "self": {"href": "/"}},
+    }
+
+    assert compiled.check(payload)
+    assert compiled.parse(payload) == PostListApi.parse_obj(payload)
+    assert not compiled.check({"data": [], "links": ["/?page[number]=2"]})
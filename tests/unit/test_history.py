@@ -0,0 +1,75 @@
+import asyncio
+import time
+
+from framework.supported_api.blog.history import HistoryRecord
+from framework.supported_api.blog.history import HistoryStore
+from framework.supported_api.blog.history import HistoryWriter
+from framework.utils.dbpool import create_sqlite_pool
+
+HOUR = 1_700_000_000 // 3600 * 3600
+
+
+def _record(ok: bool, total_ms: float, created_at: float = HOUR + 10):
+    return HistoryRecord(
+        target="http://a.example",
+        ok=ok,
+        description="",
+        total_ms=total_ms,
+        steps=[],
+        created_at=created_at,
+    )
+
+
+def _store() -> HistoryStore:
+    store = HistoryStore(create_sqlite_pool(":memory:"), placeholder="?")
+    store.setup()
+    return store
+
+
+def test_rollups_aggregate_across_batches():
+    store = _store()
+    store.write([_record(True, 40), _record(True, 80)])
+    store.write([_record(False, 700), _record(True, 90)])
+    store.write([_record(True, 30, created_at=HOUR + 3600)])
+
+    first, second = store.rollups("http://a.example")
+
+    assert first == {
+        "hour": HOUR,
+        "runs": 4,
+        "pass_rate": 0.75,
+        "avg_ms": 227.5,
+        "p50_ms": 100,
+        "p95_ms": 1000,
+        "p99_ms": 1000,
+    }
+    assert (second["hour"], second["runs"], second["p50_ms"]) == (HOUR + 3600, 1, 50)
+    assert store.rollups("http://a.example", since=HOUR + 3600) == [second]
+
+
+def test_writer_batches_in_background():
+    store = _store()
+    writer = HistoryWriter(store, batch_size=2, flush_interval=60, max_buffer=3)
+
+    async def scenario():
+        for total_ms in (10, 20, 30, 40, 50):
+            writer.record(_record(True, total_ms))
+        dropped_oldest = len(writer)
+        await writer.aclose()
+        return dropped_oldest
+
+    assert asyncio.run(scenario()) == 3
+    assert len(writer) == 0
+    assert store.rollups("http://a.example")[0]["runs"] == 3
+
+
+def test_raw_rows_are_pruned_after_retention():
+    store = HistoryStore(create_sqlite_pool(":memory:"), placeholder="?", retention=60)
+    store.setup()
+
+    store.write([_record(True, 40), _record(True, 50, created_at=time.time())])
+
+    with store._cursor() as cursor:
+        cursor.execute("SELECT total_ms FROM validation_results")
+        assert cursor.fetchall() == [(50,)]
+    assert [_r["runs"] for _r in store.rollups("http://a.example")] == [1, 1]
@@ -0,0 +1,47 @@
+import asyncio
+
+from framework.utils.http import ClientPool
+from framework.utils.http import get_origin
+
+
+def test_get_origin():
+    assert get_origin("HTTPS://Example.com:8443/api/v1/user/") == (
+        "https://example.com:8443"
+    )
+
+
+def test_pool_reuses_client_per_origin():
+    async def scenario():
+        pool = ClientPool()
+        async with pool.client("http://a.example/api/v1/user/") as first:
+            pass
+        async with pool.client("http://a.example/api/v1/blog/post/") as second:
+            pass
+        async with pool.client("http://b.example/api/v1/user/") as third:
+            pass
+        await pool.aclose()
+        return first, second, third
+
+    first, second, third = asyncio.run(scenario())
+    assert first is second
+    assert first is not third
+
+
+def test_pool_evicts_lru_idle_clients():
+    async def scenario():
+        pool = ClientPool(max_hosts=1)
+        async with pool.client("http://a.example/") as first:
+            async with pool.client("http://b.example/") as second:
+                pass
+            # the busy client stays, the idle one over the limit goes
+            busy = (len(pool), first.is_closed, second.is_closed)
+        async with pool.client("http://c.example/") as third:
+            pass
+        # the least recently used client is closed as soon as it is evicted
+        evicted = (len(pool), first.is_closed, third.is_closed)
+        await pool.aclose()
+        return busy, evicted
+
+    busy, evicted = asyncio.run(scenario())
+    assert busy == (1, False, True)
+    assert evicted == (1, True, False)
@@ -0,0 +1,118 @@
+import asyncio
+import sqlite3
+import time
+
+from framework.supported_api.blog import jobs
+from framework.supported_api.blog.jobs import JobQueue
+from framework.supported_api.blog.schemas.base import JsonApiObject
+from framework.utils.jobs import SqliteJobStore
+from framework.utils.jobs import STATUS_DONE
+from framework.utils.jobs import STATUS_FAILED
+from framework.utils.jobs import STATUS_QUEUED
+from framework.utils.jobs import STATUS_RUNNING
+
+
+def _store(**kw) -> SqliteJobStore:
+    store = SqliteJobStore(**kw)
+    store.setup()
+    return store
+
+
+def test_store_claims_each_job_once():
+    store = _store()
+    first = store.submit("http://a.example", {"fresh": True})
+    second = store.submit("http://b.example")
+
+    claimed = store.claim()
+    assert (claimed.id, claimed.status, claimed.attempts) == (
+        first.id,
+        STATUS_RUNNING,
+        1,
+    )
+    assert claimed.params == {"fresh": True}
+    assert store.claim().id == second.id
+    assert store.claim() is None
+
+    store.finish(first.id, {"data": {"ok": True}})
+    finished = store.get(first.id)
+    assert finished.status == STATUS_DONE
+    assert finished.result == {"data": {"ok": True}}
+
+
+def test_store_reclaims_expired_leases_then_fails():
+    store = _store(lease=0, max_attempts=2)
+    job = store.submit("http://a.example")
+
+    assert store.claim().attempts == 1
+    time.sleep(0.01)
+    assert store.claim().attempts == 2
+    time.sleep(0.01)
+    assert store.claim() is None
+    assert store.get(job.id).status == STATUS_FAILED
+
+
+def test_store_release_requeues_job():
+    store = _store()
+    job = store.submit("http://a.example")
+    store.claim()
+
+    store.release(job.id)
+
+    released = store.get(job.id)
+    assert (released.status, released.attempts) == (STATUS_QUEUED, 0)
+
+
+def test_queue_runs_jobs_in_background(monkeypatch):
+    async def fake_validation(url, fresh=False, timings=False):
+        await asyncio.sleep(0.01)
+        return JsonApiObject(data={"ok": True, "url": url})
+
+    monkeypatch.setattr(jobs, "run_validation", fake_validation)
+
+    async def scenario():
+        queue = JobQueue(SqliteJobStore(), workers=2, poll_interval=1)
+        await queue.start()
+        job = await queue.submit("http://a.example")
+        pending = await queue.get(job.id)
+        finished = await queue.wait(job.id, timeout=5)
+        await queue.stop()
+        return pending, finished
+
+    pending, finished = asyncio.run(scenario())
+    assert pending.status in {STATUS_QUEUED, STATUS_RUNNING}
+    assert finished.status == STATUS_DONE
+    assert finished.result["data"] == {"ok": True, "url": "http://a.example"}
+
+
+def test_worker_survives_store_errors(monkeypatch):
+    async def fake_validation(url, **_params):
+        return JsonApiObject(data={"ok": True})
+
+    class FlakyStore(SqliteJobStore):
+        failures = 2
+
+        def claim(self):
+            if self.failures:
+                self.failures -= 1
+                raise sqlite3.OperationalError("database is locked")
+            return super().claim()
+
+    monkeypatch.setattr(jobs, "run_validation", fake_validation)
+
+    async def scenario():
+        queue = JobQueue(FlakyStore(), workers=1, poll_interval=0.01)
+        await queue.start()
+        job = await queue.submit("http://a.example")
+        finished = await queue.wait(job.id, timeout=5)
+        await queue.stop()
+        return finished
+
+    assert asyncio.run(scenario()).status == STATUS_DONE
+
+
+def test_sqlite_queue_is_shared_by_processes(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    job = _store(path=path).submit("http://a.example")
+
+    # another worker process opens the same file
+    assert _store(path=path).claim().id == job.id
@@ -0,0 +1,61 @@
+import asyncio
+import json
+
+import pytest
+
+from framework.utils.jsonstream import iter_array_items
+
+
+async def _chunks(document: bytes, size: int):
+    for start in range(0, len(document), size):
+        yield document[start : start + size]
+
+
+def _collect(document: bytes, key: str, size: int = 3):
+    async def scenario():
+        return [_item async for _item in iter_array_items(_chunks(document, size), key)]
+
+    return asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("size", [1, 2, 7, 1024])
+def test_items_are_decoded_across_chunks(size):
+    data = [{"id": 12345, "content": "привет"}, 1.5, None, True, [1, [2]], "x"]
+    document = json.dumps({"errors": ["a", {"b": 1}], "data": data, "x": 1})
+
+    assert _collect(document.encode(), "data", size) == data
+
+
+def test_empty_array():
+    assert _collect(b' { "data" : [ ] } ', "data") == []
+
+
+def test_missing_member():
+    with pytest.raises(json.JSONDecodeError):
+        _collect(b'{"errors": null}', "data")
+
+
+@pytest.mark.parametrize(
+    "document",
+    [
+        b'{"data": [{"id": 1}, {"id": 2',
+        b'{"data": [1 2]}',
+        b"{1: []}",
+        b'{"data": "\xff"}',
+    ],
+)
+def test_malformed_document(document):
+    with pytest.raises(json.JSONDecodeError):
+        _collect(document, "data")
+
+
+def test_other_members_are_collected():
+    document = b'{"meta": {"n": 2}, "data": [1, 2], "links": {"next": "/?p=2"}}'
+    members = {}
+
+    async def scenario():
+        chunks = _chunks(document, 5)
+        return [_item async for _item in iter_array_items(chunks, "data", members)]
+
+    assert asyncio.run(scenario()) == [1, 2]
+    assert members == {"meta": {"n": 2}, "links": {"next": "/?p=2"}}
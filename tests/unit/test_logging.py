@@ -0,0 +1,59 @@
+import json
+import logging
+import threading
+
+from framework.utils.logging import JsonFormatter
+from framework.utils.logging import LOG_RECORDS_DROPPED
+from framework.utils.logging import NonBlockingQueueHandler
+from framework.utils.logging import SamplingFilter
+
+
+def _record(name: str = "main.view", level: int = logging.INFO, msg: str = "hi %s"):
+    return logging.LogRecord(name, level, __file__, 1, msg, ("there",), None)
+
+
+class _BlockedHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.unblocked = threading.Event()
+        self.records = []
+
+    def emit(self, record):
+        self.unblocked.wait()
+        self.records.append(record.getMessage())
+
+
+def test_json_lines_are_compact():
+    line = JsonFormatter().format(_record())
+
+    assert " " not in line.replace("hi there", "")
+    assert json.loads(line)["msg"] == "hi there"
+
+
+def test_full_queue_drops_records():
+    target = _BlockedHandler()
+    handler = NonBlockingQueueHandler(target, max_size=2)
+    dropped = LOG_RECORDS_DROPPED.value("queue_full")
+
+    for _ in range(10):
+        handler.handle(_record())
+    target.unblocked.set()
+    handler.close()
+
+    assert 2 <= len(target.records) <= 3
+    assert LOG_RECORDS_DROPPED.value("queue_full") - dropped == 10 - len(target.records)
+    assert target.records[0] == "hi there"
+
+
+def test_sampling_and_rate_limits_apply_to_child_loggers():
+    sampling = SamplingFilter({"main": 0.0}, {})
+    limited = SamplingFilter({}, {"main": 1.0})
+
+    assert not sampling.filter(_record("main.view"))
+    assert sampling.filter(_record("main.view", logging.ERROR))
+    assert sampling.filter(_record("other"))
+    assert [limited.filter(_record("main.view")) for _ in range(3)] == [
+        True,
+        False,
+        False,
+    ]
@@ -0,0 +1,33 @@
+from framework.utils.metrics import Registry
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    histogram = registry.histogram("h", "help", ("step",), buckets=(1, 2))
+
+    for value in (0.5, 1, 1.5, 3):
+        histogram.observe(value, "list")
+
+    assert registry.render().splitlines() == [
+        "# HELP h help",
+        "# TYPE h histogram",
+        'h_bucket{step="list",le="1"} 2',
+        'h_bucket{step="list",le="2"} 3',
+        'h_bucket{step="list",le="+Inf"} 4',
+        'h_sum{step="list"} 6.0',
+        'h_count{step="list"} 4',
+    ]
+
+
+def test_counter_and_gauge():
+    registry = Registry()
+    counter = registry.counter("c", "help", ("kind",))
+    registry.gauge("g", "help", lambda: {("a",): 1.5}, ("kind",))
+
+    counter.inc('"quoted"')
+    counter.inc('"quoted"', amount=2)
+
+    lines = registry.render().splitlines()
+    assert "# TYPE c_total counter" in lines
+    assert 'c_total{kind="\\"quoted\\""} 3' in lines
+    assert 'g{kind="a"} 1.5' in lines
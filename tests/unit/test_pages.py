@@ -0,0 +1,46 @@
+import gzip
+
+from starlette.requests import Request
+
+from framework.utils.pages import Page
+from framework.utils.pages import render_pages
+
+
+def _request(**headers) -> Request:
+    raw = [(_k.replace("_", "-").encode(), _v.encode()) for _k, _v in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw})
+
+
+def test_compressed_variant_is_negotiated():
+    page = Page.build(b"<p>hello</p>" * 100)
+
+    resp = page.response(_request(accept_encoding="deflate, gzip;q=0.5"))
+    plain = page.response(_request(accept_encoding="gzip;q=0"))
+
+    assert resp.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(resp.body) == b"<p>hello</p>" * 100
+    assert "content-encoding" not in plain.headers
+    assert resp.headers["etag"] != plain.headers["etag"]
+    assert resp.headers["cache-control"].startswith("public, max-age=")
+
+
+def test_conditional_get_is_not_modified():
+    page = render_pages("index.html")["index.html"]
+    etag = page.response(_request(accept_encoding="gzip")).headers["etag"]
+
+    resp = page.response(_request(accept_encoding="gzip", if_none_match=etag))
+
+    assert resp.status_code == 304
+    assert resp.body == b""
+    assert resp.headers["etag"] == etag
+
+
+def test_other_variant_etag_is_not_cached():
+    page = render_pages("index.html")["index.html"]
+    etag = page.response(_request(accept_encoding="gzip")).headers["etag"]
+
+    resp = page.response(_request(accept_encoding="identity", if_none_match=etag))
+
+    assert resp.status_code == 200
+    assert resp.body
+    assert resp.headers["etag"] != etag
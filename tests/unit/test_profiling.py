@@ -0,0 +1,34 @@
+import time
+
+from framework.utils.profiling import SamplingProfiler
+from framework.utils.profiling import TRUNCATED_STACK
+
+
+def _busy_loop(seconds: float) -> None:
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def test_samples_are_taken_only_within_sessions():
+    profiler = SamplingProfiler(interval=0.001)
+
+    with profiler.session():
+        _busy_loop(0.1)
+    samples = profiler.samples
+    _busy_loop(0.05)
+
+    assert samples > 0
+    assert profiler.samples - samples <= 1
+    assert "_busy_loop (test_profiling.py:" in profiler.collapsed()
+
+
+def test_distinct_stacks_are_bounded():
+    profiler = SamplingProfiler(interval=0.001, max_stacks=1)
+
+    with profiler.session():
+        _busy_loop(0.02)
+        time.sleep(0.02)
+
+    assert len(profiler.stacks) <= 2
+    assert set(profiler.stacks) - {TRUNCATED_STACK}
@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+
+from framework.utils.scenario import run_steps
+from framework.utils.scenario import Step
+
+
+def test_independent_steps_run_concurrently():
+    started = []
+
+    async def root(_results):
+        return 1
+
+    async def leaf(results):
+        started.append(results["root"])
+        await asyncio.sleep(0.05)
+        return len(started)
+
+    steps = (
+        Step("root", root),
+        Step("left", leaf, depends=("root",)),
+        Step("right", leaf, depends=("root",)),
+    )
+
+    results = asyncio.run(run_steps(steps))
+    assert results == {"root": 1, "left": 2, "right": 2}
+
+
+def test_first_failure_is_reported_and_others_cancelled():
+    cancelled = []
+
+    async def fail(_results):
+        raise AssertionError("boom")
+
+    async def slow(_results):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    steps = (Step("slow", slow), Step("fail", fail))
+
+    with pytest.raises(AssertionError, match="boom") as exc_info:
+        asyncio.run(run_steps(steps))
+
+    assert exc_info.value.step == "fail"
+    assert cancelled == [True]
+
+
+def test_graph_must_be_topologically_ordered():
+    async def noop(_results):
+        pass
+
+    steps = (Step("b", noop, depends=("a",)), Step("a", noop))
+
+    with pytest.raises(ValueError):
+        asyncio.run(run_steps(steps))
@@ -0,0 +1,104 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from framework.supported_api.blog import runner
+from framework.supported_api.blog import timings
+from framework.supported_api.blog.failures import CheckFailed
+from framework.supported_api.blog.timings import BudgetExhausted
+from framework.supported_api.blog.timings import CallTiming
+from framework.supported_api.blog.timings import collect_timings
+from framework.supported_api.blog.timings import measure_call
+from framework.supported_api.blog.timings import reserve_calls
+from framework.utils import config
+
+# stands in for the time module: time passes only when a test moves it
+clock = SimpleNamespace(now=0.0, perf_counter=lambda: clock.now)
+
+
+async def _chunks(*chunks):
+    for chunk in chunks:
+        clock.now += 0.1
+        yield chunk
+
+
+def test_network_time_is_split_by_trace_events(monkeypatch):
+    monkeypatch.setattr(timings, "time", clock)
+    clock.now = 0.0
+    timing = CallTiming("list", _started=0.0, _mark=0.0)
+
+    async def scenario():
+        for now, event in (
+            (0.0, "connection.connect_tcp.started"),
+            (0.1, "connection.connect_tcp.complete"),
+            (0.1, "connection.start_tls.started"),
+            (0.15, "connection.start_tls.complete"),
+            (0.4, "http11.receive_response_headers.complete"),
+        ):
+            clock.now = now
+            await timing.trace(event, {})
+        timing.network = timing.lap()
+        return [_c async for _c in timing.metered(_chunks(b"abc", b"de"))]
+
+    assert asyncio.run(scenario()) == [b"abc", b"de"]
+    timing.decode, timing.validation = 0.01, 0.02
+
+    assert timing.report() == {
+        "step": "list",
+        "outcome": "ok",
+        "connect_ms": 150.0,
+        "ttfb_ms": 250.0,
+        "transfer_ms": 200.0,
+        "parse_ms": 30.0,
+        "size": 5,
+    }
+
+
+def test_calls_are_collected_and_recorded():
+    recorded = timings.NETWORK_SECONDS.count("t", "failed")
+
+    with collect_timings() as collected:
+        with measure_call("t"):
+            pass
+        with pytest.raises(CheckFailed):
+            with measure_call("t"):
+                raise CheckFailed("wrong", kind="status")
+
+    assert [(_t.step, _t.outcome) for _t in collected] == [
+        ("t", "ok"),
+        ("t", "failed"),
+    ]
+    assert timings.NETWORK_SECONDS.count("t", "failed") == recorded + 1
+
+
+def test_calls_are_reserved_before_they_are_sent():
+    budget = ["list"]
+
+    with collect_timings() as collected, reserve_calls(lambda _s: bool(budget)):
+        with measure_call("list"):
+            budget.pop()
+        with pytest.raises(BudgetExhausted):
+            with measure_call("list"):
+                pytest.fail("a refused call must not be sent")
+
+    assert [_t.step for _t in collected] == ["list"]
+
+
+def test_timings_are_returned_on_request(monkeypatch):
+    async def target(_url):
+        with measure_call("list") as timing:
+            timing.size = 10
+
+    monkeypatch.setattr(config, "_settings", config.Settings(HISTORY_ENABLED=False))
+    monkeypatch.setattr(runner, "_cache", None)
+    monkeypatch.setattr(runner, "test_post_global", target)
+
+    brief = asyncio.run(runner.run_validation("http://a.example"))
+    # served from the cache, which keeps timings
+    full = asyncio.run(runner.run_validation("http://a.example", timings=True))
+
+    assert "timings" not in brief.data
+    assert full.data["timings"]["total_ms"] >= 0
+    assert [_s["step"] for _s in full.data["timings"]["steps"]] == ["list"]
+    assert full.data["timings"]["steps"][0]["size"] == 10
@@ -0,0 +1,75 @@
+import pytest
+import sentry_sdk
+from sentry_sdk.integrations.wsgi import SentryWsgiMiddleware
+
+from framework.utils import config
+from framework.utils.tracing import init_tracing
+from framework.utils.tracing import RecordingTransport
+from framework.utils.tracing import TraceSampler
+
+
+@pytest.fixture()
+def transport(monkeypatch):
+    settings = config.Settings(
+        TRACES_SAMPLE_RATE=0.0,
+        TRACES_ROUTE_RATES="/always/=1",
+        TRACES_MAX_PER_SECOND=0.0,
+    )
+    monkeypatch.setattr(config, "_settings", settings)
+    transport = RecordingTransport()
+    init_tracing(transport=transport)
+
+    yield transport
+
+    sentry_sdk.Hub.current.bind_client(None)
+
+
+def _app(environ, start_response):
+    if environ["PATH_INFO"] == "/fail/":
+        raise ValueError("broken")
+    start_response("200 OK", [])
+    return [b"ok"]
+
+
+def _get(path: str) -> None:
+    environ = {
+        "REQUEST_METHOD": "GET",
+        "PATH_INFO": path,
+        "SERVER_NAME": "localhost",
+        "SERVER_PORT": "80",
+        "wsgi.url_scheme": "http",
+    }
+    try:
+        list(SentryWsgiMiddleware(_app)(environ, lambda *_args: None))
+    except ValueError:
+        pass
+
+
+def test_sampler_keeps_errors_and_slow_requests_over_budget():
+    sampler = TraceSampler(1.0, {"/metrics": 0.0}, 1.0, max_per_second=1)
+
+    assert sampler.decide(["/metrics"], 0.01, error=False) == "dropped"
+    assert sampler.decide(["/"], 0.01, error=False) == "sampled"
+    assert sampler.decide(["/"], 0.01, error=False) == "over_budget"
+    assert sampler.decide(["/metrics"], 0.01, error=True) == "error"
+    assert sampler.decide(["/"], 1.5, error=False) == "slow"
+
+
+def test_continued_traces_keep_the_decision_of_their_parent():
+    sampler = TraceSampler(0.0, {}, 1.0, max_per_second=0)
+    continued = {"contexts": {"trace": {"parent_span_id": "a" * 16}}}
+
+    assert sampler.traces_sampler({"parent_sampled": False}) is False
+    assert sampler.traces_sampler({"parent_sampled": True}) is True
+    assert sampler.traces_sampler({}) is True
+    assert sampler.keep(continued) is True
+    assert sampler.keep({"contexts": {"trace": {}}}) is False
+
+
+def test_transactions_are_sampled_by_route_and_status(transport):
+    for path in ("/always/", "/never/", "/fail/"):
+        _get(path)
+
+    paths = [_t["request"]["url"] for _t in transport.transactions]
+    assert paths == ["http://localhost/always/", "http://localhost/fail/"]
+    assert transport.events[0]["exception"]["values"][0]["value"] == "broken"